@@ -1,11 +1,18 @@
+import os
 import streamlit as st
-import pandas as pd
-import joblib
-from sklearn.preprocessing import LabelEncoder
+from artifact import DEFAULT_PIPELINE, input_dtype, load_model
+from features import FeatureEncoder
+from telemetry import request, summary_rows, timed, timer, to_json, to_prometheus
+
+
+@st.cache_resource
+@timed('fraud_app.load_model')
+def load_fraud_model():
+    return load_model(os.environ.get("FRAUD_MODEL", DEFAULT_PIPELINE))
 
-model = joblib.load("fraud_detection_pipeline.pkl")
 
 st.set_page_config(page_title="Fraud Detection", layout="centered")
+model = load_fraud_model()
 st.title("💸 Real-Time Fraud Detection System")
 st.markdown("Enter transaction details to predict if it's **fraudulent** or **legitimate**.")
 
@@ -17,23 +24,18 @@ newbalanceOrig = st.number_input("New Balance of Origin Account", min_value=0.0)
 oldbalanceDest = st.number_input("Old Balance of Destination Account", min_value=0.0)
 newbalanceDest = st.number_input("New Balance of Destination Account", min_value=0.0)
 
-isFlaggedFraud = 1 if type_ == 'TRANSFER' and amount > 200000 else 0
+if 'encoder' not in st.session_state:
+    st.session_state.encoder = FeatureEncoder(dtype=input_dtype(model))
 
-type_encoder = LabelEncoder()
-type_encoder.fit(['CASH_OUT', 'PAYMENT', 'TRANSFER', 'DEBIT', 'CASH_IN'])
-type_encoded = type_encoder.transform([type_])[0]
-
-input_data = [[
-    step, type_encoded, amount, oldbalanceOrg, newbalanceOrig,
-    oldbalanceDest, newbalanceDest, isFlaggedFraud
-]]
-input_df = pd.DataFrame(input_data, columns=[
-    'step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
-    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud'
-])
+with timer('fraud_app.encode'):
+    input_data = st.session_state.encoder.encode_one(
+        step, type_, amount, oldbalanceOrg, newbalanceOrig,
+        oldbalanceDest, newbalanceDest
+    )
 
 if st.button("Predict Fraud"):
-    probability = model.predict_proba(input_df)[0][1]
+    with request('fraud_app.predict'):
+        probability = model.predict_proba(input_data)[0][1]
     custom_threshold = 0.3  
     prediction = 1 if probability >= custom_threshold else 0  
 
@@ -41,3 +43,9 @@ if st.button("Predict Fraud"):
         st.error(f"❌ Fraudulent Transaction Detected! (Confidence: {probability:.2%})")
     else:
         st.success(f"✅ Legitimate Transaction (Confidence: {1 - probability:.2%})")
+
+# Per-stage latency for this server process, shared by all sessions
+with st.sidebar.expander("Latency"):
+    st.dataframe(summary_rows(), hide_index=True)
+    st.download_button("Metrics (JSON)", to_json(indent=2), file_name="metrics.json")
+    st.download_button("Metrics (Prometheus)", to_prometheus('fraud_app'), file_name="metrics.prom")
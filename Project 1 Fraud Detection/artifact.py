@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from features import FEATURE_COLUMNS
+from telemetry import timed
+
+DEFAULT_PIPELINE = 'fraud_detection_pipeline.pkl'
+DEFAULT_ARTIFACT_DIR = 'fraud_model'
+METADATA_FILE = 'metadata.json'
+FORMAT_VERSION = 1
+
+
+def split_pipeline(pipeline):
+    steps = [step for _, step in pipeline.steps]
+    if len(steps) != 2 or not hasattr(steps[0], 'scale_') or not hasattr(steps[1], 'get_booster'):
+        raise ValueError("Expected a fitted Pipeline of StandardScaler -> XGBClassifier")
+    return steps[0], steps[1]
+
+
+def scaler_params(scaler):
+    n = scaler.n_features_in_
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n)
+    return mean, scale
+
+
+@timed('artifact.write')
+def write_artifact(booster, mean, scale, out_dir=DEFAULT_ARTIFACT_DIR, fmt='ubj', threshold=0.3,
+                   objective='binary:logistic'):
+    import xgboost
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_file = f'model.{fmt}'
+    booster.save_model(os.path.join(out_dir, model_file))
+
+    best_iteration = booster.attr('best_iteration')
+    metadata = {
+        'format_version': FORMAT_VERSION,
+        'model_file': model_file,
+        'feature_columns': FEATURE_COLUMNS,
+        'mean': [float(v) for v in mean],
+        'scale': [float(v) for v in scale],
+        'objective': objective,
+        'iteration_range': [0, int(best_iteration) + 1] if best_iteration is not None else [0, 0],
+        'threshold': threshold,
+        'xgboost_version': xgboost.__version__,
+    }
+    with open(os.path.join(out_dir, METADATA_FILE), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata
+
+
+def export_pipeline(pipeline, out_dir=DEFAULT_ARTIFACT_DIR, fmt='ubj', threshold=0.3):
+    scaler, clf = split_pipeline(pipeline)
+    mean, scale = scaler_params(scaler)
+    return write_artifact(clf.get_booster(), mean, scale, out_dir, fmt, threshold, clf.objective)
+
+
+def read_metadata(path):
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {metadata.get('format_version')}")
+    if metadata['feature_columns'] != FEATURE_COLUMNS:
+        raise ValueError("Artifact feature columns do not match features.FEATURE_COLUMNS")
+    return metadata
+
+
+def standardize(X, mean, scale):
+    # Same in-place arithmetic as StandardScaler.transform, so float32 input stays float32
+    X = np.array(X, dtype=np.float32 if getattr(X, 'dtype', None) == np.float32 else np.float64)
+    X -= mean
+    X /= scale
+    return X
+
+
+def input_dtype(model):
+    # StandardScaler on float32 input rounds differently from the float64 DataFrame the pipeline was
+    # fitted on, so only models that declare float32 (the artifact and NumPy engines) are fed it
+    return getattr(model, 'input_dtype', np.float64)
+
+
+class FraudModel:
+    # Scores with a bare xgboost.Booster; the StandardScaler step is reapplied from the sidecar's
+    # mean/scale, so outputs match the pickled pipeline.
+    input_dtype = np.float32
+
+    def __init__(self, booster, mean, scale, metadata):
+        self.booster = booster
+        self.mean = mean
+        self.scale = scale
+        self.metadata = metadata
+        self.iteration_range = tuple(metadata.get('iteration_range', (0, 0)))
+
+    @classmethod
+    def load(cls, path=DEFAULT_ARTIFACT_DIR):
+        import xgboost
+
+        metadata = read_metadata(path)
+        booster = xgboost.Booster()
+        booster.load_model(os.path.join(path, metadata['model_file']))
+        return cls(booster, np.asarray(metadata['mean']), np.asarray(metadata['scale']), metadata)
+
+    def transform(self, X):
+        return standardize(X, self.mean, self.scale)
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(self.transform(X), iteration_range=self.iteration_range)
+        return np.column_stack([1 - p, p])
+
+
+def load_model(path=DEFAULT_PIPELINE):
+    if os.path.isdir(path):
+        return FraudModel.load(path)
+    import joblib
+    return joblib.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the fraud pipeline to a native XGBoost artifact.")
+    parser.add_argument('--pipeline', default=DEFAULT_PIPELINE)
+    parser.add_argument('--out', default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument('--format', choices=['ubj', 'json'], default='ubj')
+    parser.add_argument('--threshold', type=float, default=0.3)
+    parser.add_argument('--check-rows', type=int, default=10000,
+                        help="Random rows used to compare the artifact against the pipeline (0 to skip)")
+    args = parser.parse_args(argv)
+
+    import joblib
+    pipeline = joblib.load(args.pipeline)
+    export_pipeline(pipeline, args.out, fmt=args.format, threshold=args.threshold)
+    print(f"Exported {args.pipeline} to {args.out}/")
+
+    if args.check_rows:
+        from bench_features import random_frame
+        from features import FeatureEncoder
+
+        # Each model gets the input dtype it is served with
+        model = FraudModel.load(args.out)
+        frame = random_frame(args.check_rows)
+        X = FeatureEncoder(args.check_rows, input_dtype(model)).encode_frame(frame)
+        X_pipeline = FeatureEncoder(args.check_rows, input_dtype(pipeline)).encode_frame(frame)
+        diff = np.abs(model.predict_proba(X) - pipeline.predict_proba(X_pipeline)).max()
+        print(f"Max |artifact - pipeline| probability difference on {args.check_rows:,} rows: {diff:.3g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import statistics
+
+from telemetry import run_probe
+
+# Each loader runs in a fresh interpreter so import cost and peak RSS are measured from a cold start.
+# The artifact loader never imports sklearn or pandas itself, but `import xgboost` pulls in both
+# through its sklearn/pandas compatibility shims whenever they are installed, so the sklearn and
+# pandas columns report what actually ended up in sys.modules. Only the JSON artifact read by
+# tree_eval avoids xgboost, and with it both libraries.
+PREDICT = """
+mark('load_s')
+import numpy as np
+from artifact import input_dtype
+X = np.array([[1, 4, 250000.0, 250000.0, 0.0, 0.0, 0.0, 1]], dtype=input_dtype(model))
+model.predict_proba(X)
+mark('first_prediction_s')
+"""
+
+LOADERS = {
+    'pickle (joblib + sklearn Pipeline)': "import joblib\nmodel = joblib.load({path!r})",
+    'artifact (xgboost Booster + sidecar)': "from artifact import FraudModel\nmodel = FraudModel.load({path!r})",
+    'artifact (numpy trees, JSON only)': "from tree_eval import NumpyFraudModel\nmodel = NumpyFraudModel.from_artifact({path!r})",
+}
+
+
+def probe(load, path):
+    return run_probe(load.format(path=path) + PREDICT, modules=['sklearn', 'pandas'])
+
+
+def is_json_artifact(path):
+    from artifact import read_metadata
+
+    return read_metadata(path)['model_file'].endswith('.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cold-start time and peak RSS of the pickle vs the exported artifact.")
+    parser.add_argument('--pipeline', default='fraud_detection_pipeline.pkl')
+    parser.add_argument('--artifact', default='fraud_model')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    paths = dict(zip(LOADERS, [args.pipeline, args.artifact, args.artifact]))
+    print(f"{'loader':<40}{'load ms':>10}{'first pred ms':>15}{'max RSS MB':>12}{'sklearn':>9}{'pandas':>8}")
+    for name, load in LOADERS.items():
+        if 'JSON only' in name and not is_json_artifact(paths[name]):
+            print(f"{name:<40}  skipped: {paths[name]} holds a UBJ model, export with --format json")
+            continue
+        runs = [probe(load, paths[name]) for _ in range(args.repeat)]
+        print(f"{name:<40}"
+              f"{statistics.median(r['load_s'] for r in runs) * 1000:>10.1f}"
+              f"{statistics.median(r['first_prediction_s'] for r in runs) * 1000:>15.1f}"
+              f"{statistics.median(r['max_rss_mb'] for r in runs):>12.1f}"
+              f"{str(runs[0]['modules_loaded']['sklearn']):>9}"
+              f"{str(runs[0]['modules_loaded']['pandas']):>8}")
+
+
+if __name__ == "__main__":
+    main()
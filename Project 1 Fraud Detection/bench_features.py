@@ -0,0 +1,112 @@
+import argparse
+import os
+import timeit
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from artifact import input_dtype
+from dataset import DEFAULT_CSV
+from features import FEATURE_COLUMNS, INPUT_COLUMNS, TRANSACTION_TYPES, FeatureEncoder
+
+SAMPLE = (1, 'TRANSFER', 250000.0, 250000.0, 0.0, 0.0, 0.0)
+
+
+# Feature assembly exactly as app.py did it before FeatureEncoder
+def legacy_assemble(step, type_, amount, oldbalanceOrg, newbalanceOrig, oldbalanceDest, newbalanceDest):
+    isFlaggedFraud = 1 if type_ == 'TRANSFER' and amount > 200000 else 0
+
+    type_encoder = LabelEncoder()
+    type_encoder.fit(['CASH_OUT', 'PAYMENT', 'TRANSFER', 'DEBIT', 'CASH_IN'])
+    type_encoded = type_encoder.transform([type_])[0]
+
+    input_data = [[
+        step, type_encoded, amount, oldbalanceOrg, newbalanceOrig,
+        oldbalanceDest, newbalanceDest, isFlaggedFraud
+    ]]
+    return pd.DataFrame(input_data, columns=FEATURE_COLUMNS)
+
+
+# legacy_assemble applied to a whole frame: same LabelEncoder codes, same int/float column dtypes
+def legacy_frame(df):
+    type_encoder = LabelEncoder()
+    type_encoder.fit(['CASH_OUT', 'PAYMENT', 'TRANSFER', 'DEBIT', 'CASH_IN'])
+    out = df[INPUT_COLUMNS].copy()
+    out['type'] = type_encoder.transform(df['type'])
+    out['isFlaggedFraud'] = ((df['type'] == 'TRANSFER') & (df['amount'] > 200000)).astype(np.int64)
+    return out[FEATURE_COLUMNS]
+
+
+def check_parity(model, df):
+    # The model must score FeatureEncoder output exactly as it scored the legacy DataFrame
+    expected = model.predict_proba(legacy_frame(df))
+    actual = model.predict_proba(FeatureEncoder(len(df), input_dtype(model)).encode_frame(df))
+    return np.abs(actual - expected).max()
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def random_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'step': rng.integers(1, 744, n),
+        'type': rng.choice(TRANSACTION_TYPES, n),
+        'amount': rng.exponential(150000, n),
+        'oldbalanceOrg': rng.exponential(800000, n),
+        'newbalanceOrig': rng.exponential(800000, n),
+        'oldbalanceDest': rng.exponential(1000000, n),
+        'newbalanceDest': rng.exponential(1000000, n),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-row fraud feature assembly cost.")
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--model', default='fraud_detection_pipeline.pkl')
+    parser.add_argument('--data', default=DEFAULT_CSV, help="PaySim CSV whose first --rows rows join the parity check")
+    args = parser.parse_args(argv)
+
+    np.testing.assert_array_equal(
+        legacy_assemble(*SAMPLE).to_numpy(np.float32), FeatureEncoder().encode_one(*SAMPLE)
+    )
+
+    encoder = FeatureEncoder()
+    results = {
+        'legacy LabelEncoder + DataFrame': per_call_us(lambda: legacy_assemble(*SAMPLE), args.number),
+        'FeatureEncoder.encode_one': per_call_us(lambda: encoder.encode_one(*SAMPLE), args.number),
+    }
+
+    if os.path.exists(args.model):
+        import joblib
+        model = joblib.load(args.model)
+        X = FeatureEncoder(dtype=input_dtype(model)).encode_one(*SAMPLE)
+        results['model.predict_proba (1 row, for scale)'] = per_call_us(lambda: model.predict_proba(X), args.number // 10)
+
+        frames = {'sample row': pd.DataFrame([SAMPLE], columns=INPUT_COLUMNS),
+                  f'random_frame({args.rows:,})': random_frame(args.rows)}
+        if os.path.exists(args.data):
+            frames[f'{args.data} ({args.rows:,} rows)'] = pd.read_csv(args.data, nrows=args.rows, usecols=INPUT_COLUMNS)
+        for name, df in frames.items():
+            diff = check_parity(model, df)
+            print(f"predict_proba parity vs legacy DataFrame on {name}: max |diff| {diff:.3g}")
+            if diff:
+                raise SystemExit("FeatureEncoder output does not score like the legacy DataFrame")
+        print()
+
+    print(f"{'single row':<42}{'us/row':>12}")
+    for name, us in results.items():
+        print(f"{name:<42}{us:>12.2f}")
+
+    df = random_frame(args.rows)
+    batch_encoder = FeatureEncoder(args.rows)
+    seconds = min(timeit.repeat(lambda: batch_encoder.encode_frame(df), number=1, repeat=5))
+    print(f"\nFeatureEncoder.encode_frame: {args.rows:,} rows in {seconds * 1000:.1f} ms "
+          f"({seconds / args.rows * 1e9:.0f} ns/row)")
+
+
+if __name__ == "__main__":
+    main()
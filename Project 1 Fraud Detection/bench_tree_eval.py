@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import numpy as np
+
+from artifact import DEFAULT_PIPELINE, FraudModel, load_model, split_pipeline
+from bench_features import random_frame
+from features import FeatureEncoder
+from tree_eval import NumpyFraudModel
+
+BATCH_SIZES = [1, 64, 4096, 1_000_000]
+TOLERANCE = 1e-6
+
+
+def time_per_call(fn, min_seconds=0.5):
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy tree evaluator against XGBoost's predictor.")
+    parser.add_argument('--model', default=DEFAULT_PIPELINE)
+    parser.add_argument('--batch-sizes', type=int, nargs='*', default=BATCH_SIZES)
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    numpy_model = NumpyFraudModel.from_model(model)
+    if isinstance(model, FraudModel):
+        booster, transform = model.booster, model.transform
+    else:
+        scaler, clf = split_pipeline(model)
+        booster, transform = clf.get_booster(), scaler.transform
+
+    X_all = FeatureEncoder(max(args.batch_sizes)).encode_frame(random_frame(max(args.batch_sizes)))
+    print(f"{len(numpy_model.ensemble.roots)} trees, max depth {numpy_model.ensemble.max_depth}\n")
+    print(f"{'batch':>9}{'model.predict_proba':>22}{'booster.inplace_predict':>26}{'numpy':>14}{'max |diff|':>13}")
+
+    for n in args.batch_sizes:
+        X = X_all[:n]
+        Xs = transform(X)
+        diff = np.abs(numpy_model.predict_proba(X) - model.predict_proba(X)).max()
+        results = [
+            time_per_call(lambda: model.predict_proba(X)),
+            time_per_call(lambda: booster.inplace_predict(Xs)),
+            time_per_call(lambda: numpy_model.predict_proba(X)),
+        ]
+        print(f"{n:>9,}" + ''.join(f"{t * 1e6:>{w - 3}.1f} us" for t, w in zip(results, (22, 26, 14)))
+              + f"{diff:>13.2g}" + ('' if diff <= TOLERANCE else '  MISMATCH'))
+
+
+if __name__ == "__main__":
+    main()
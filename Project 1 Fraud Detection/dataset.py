@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLUMNS, N_FEATURES, TRANSACTION_TYPES
+from storage import atomic_write_json, staging_dir
+from telemetry import timed
+
+DEFAULT_CSV = './dataset/Paysim.csv'
+DEFAULT_CACHE_DIR = './dataset/paysim_cache'
+MANIFEST_FILE = 'manifest.json'
+CACHE_VERSION = 2
+
+# Compact on-disk dtypes; nameOrig/nameDest are dropped as in train.ipynb
+COLUMN_DTYPES = {
+    'step': np.int16,
+    'type': np.int8,
+    'amount': np.float32,
+    'oldbalanceOrg': np.float32,
+    'newbalanceOrig': np.float32,
+    'oldbalanceDest': np.float32,
+    'newbalanceDest': np.float32,
+    'isFraud': np.int8,
+    'isFlaggedFraud': np.int8,
+}
+
+
+def file_checksum(path, block_size=8 * 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(cache_dir, manifest):
+    atomic_write_json(os.path.join(cache_dir, MANIFEST_FILE), manifest, indent=2)
+
+
+@timed('dataset.build_cache')
+def build_cache(csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR, chunksize=1_000_000):
+    # Columns are written to a private staging directory that replaces the cache only once complete
+    with staging_dir(cache_dir) as tmp_dir:
+        files = {col: open(os.path.join(tmp_dir, f'{col}.bin'), 'wb') for col in COLUMN_DTYPES}
+        n_rows = 0
+        try:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=list(COLUMN_DTYPES)):
+                codes = pd.Categorical(chunk['type'], categories=TRANSACTION_TYPES).codes
+                if (codes < 0).any():
+                    raise ValueError(f"Unknown transaction type(s): {sorted(set(chunk['type'][codes < 0]))}")
+                chunk['type'] = codes
+                for col, dtype in COLUMN_DTYPES.items():
+                    chunk[col].to_numpy(dtype).tofile(files[col])
+                n_rows += len(chunk)
+        finally:
+            for f in files.values():
+                f.close()
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'source': os.path.abspath(csv_path),
+            'checksum': file_checksum(csv_path),
+            **source_signature(csv_path),
+            'rows': n_rows,
+            'columns': {col: np.dtype(dtype).str for col, dtype in COLUMN_DTYPES.items()},
+            'type_categories': TRANSACTION_TYPES,
+        }
+        write_manifest(tmp_dir, manifest)
+    return manifest
+
+
+def cache_is_valid(csv_path, cache_dir, manifest):
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return False
+    if manifest['columns'] != {col: np.dtype(dtype).str for col, dtype in COLUMN_DTYPES.items()}:
+        return False
+    if not os.path.exists(csv_path):
+        # Source moved away: the cache is all we have
+        return True
+    signature = source_signature(csv_path)
+    if all(manifest.get(k) == v for k, v in signature.items()):
+        return True
+    # Touched but maybe unchanged: fall back to the checksum and refresh the signature if it still matches
+    if file_checksum(csv_path) != manifest['checksum']:
+        return False
+    manifest.update(signature)
+    write_manifest(cache_dir, manifest)
+    return True
+
+
+def load_cache(cache_dir=DEFAULT_CACHE_DIR, manifest=None):
+    manifest = manifest or read_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No PaySim cache in {cache_dir}")
+    n = manifest['rows']
+    return {
+        col: np.memmap(os.path.join(cache_dir, f'{col}.bin'), dtype=np.dtype(dtype), mode='r', shape=(n,))
+        for col, dtype in manifest['columns'].items()
+    }
+
+
+def open_cache(csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR, rebuild=False):
+    manifest = read_manifest(cache_dir)
+    if rebuild or not cache_is_valid(csv_path, cache_dir, manifest):
+        manifest = build_cache(csv_path, cache_dir)
+    return load_cache(cache_dir, manifest)
+
+
+def load_xy(csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR):
+    # Same X/y as the notebook's read_csv + LabelEncoder + drop, as a float32 matrix instead of a DataFrame
+    columns = open_cache(csv_path, cache_dir)
+    X = np.empty((len(columns['isFraud']), N_FEATURES), dtype=np.float32)
+    for i, col in enumerate(FEATURE_COLUMNS):
+        X[:, i] = columns[col]
+    return X, columns['isFraud']
+
+
+def load_frame(csv_path=DEFAULT_CSV, cache_dir=DEFAULT_CACHE_DIR, columns=None, decode_type=False):
+    cache = open_cache(csv_path, cache_dir)
+    df = pd.DataFrame({col: cache[col] for col in (columns or cache)})
+    if decode_type and 'type' in df:
+        df['type'] = pd.Categorical.from_codes(df['type'], categories=TRANSACTION_TYPES)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or check the columnar PaySim cache.")
+    parser.add_argument('--csv', default=DEFAULT_CSV)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    columns = open_cache(args.csv, args.cache_dir, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+    size = sum(col.nbytes for col in columns.values())
+    print(f"{len(columns['isFraud']):,} rows, {size / 1e6:.1f} MB on disk, ready in {elapsed:.2f}s ({args.cache_dir})")
+
+
+if __name__ == "__main__":
+    main()
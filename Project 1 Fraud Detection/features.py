@@ -0,0 +1,79 @@
+import numpy as np
+
+# Column order the pipeline was trained on (train.ipynb drops nameOrig/nameDest and isFraud)
+FEATURE_COLUMNS = [
+    'step', 'type', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud'
+]
+INPUT_COLUMNS = FEATURE_COLUMNS[:-1]
+N_FEATURES = len(FEATURE_COLUMNS)
+
+# LabelEncoder sorts its classes, so this table reproduces app.py's old per-rerun fit
+TRANSACTION_TYPES = ['CASH_IN', 'CASH_OUT', 'DEBIT', 'PAYMENT', 'TRANSFER']
+TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+TRANSFER_CODE = TYPE_CODES['TRANSFER']
+FLAG_AMOUNT = 200000
+
+
+def transaction_row(tx):
+    if not isinstance(tx, dict):
+        raise ValueError("Each transaction must be a JSON object")
+    try:
+        code = TYPE_CODES[tx['type']]
+        values = [float(tx[col]) for col in INPUT_COLUMNS[2:]]
+        step = float(tx['step'])
+    except KeyError as e:
+        raise ValueError(f"Missing or unknown field: {e}") from None
+    except (TypeError, ValueError):
+        raise ValueError("Numeric fields must be numbers") from None
+    flagged = 1.0 if code == TRANSFER_CODE and values[0] > FLAG_AMOUNT else 0.0
+    return (step, float(code), *values, flagged)
+
+
+class FeatureEncoder:
+    # Rows are written into one preallocated buffer; every encode_* call returns a view into it,
+    # so the result is only valid until the next call on the same encoder. Pass the model's
+    # artifact.input_dtype: sklearn pipelines need float64 to score exactly like the DataFrame
+    # they were fitted on, the artifact and NumPy engines read float32.
+    def __init__(self, capacity=1, dtype=np.float32):
+        self.buffer = np.zeros((capacity, N_FEATURES), dtype=dtype)
+
+    def reserve(self, n):
+        if n > len(self.buffer):
+            self.buffer = np.zeros((max(n, 2 * len(self.buffer)), N_FEATURES), dtype=self.buffer.dtype)
+        return self.buffer[:n]
+
+    def encode_one(self, step, type_, amount, oldbalanceOrg, newbalanceOrig, oldbalanceDest, newbalanceDest):
+        code = TYPE_CODES[type_]
+        row = self.buffer[0]
+        row[0] = step
+        row[1] = code
+        row[2] = amount
+        row[3] = oldbalanceOrg
+        row[4] = newbalanceOrig
+        row[5] = oldbalanceDest
+        row[6] = newbalanceDest
+        row[7] = code == TRANSFER_CODE and amount > FLAG_AMOUNT
+        return self.buffer[:1]
+
+    def encode_rows(self, rows):
+        X = self.reserve(len(rows))
+        X[:] = rows
+        return X
+
+    def encode_frame(self, df):
+        # Imported here so the artifact and serving paths, which only need the constants, stay pandas-free
+        import pandas as pd
+
+        codes = pd.Categorical(df['type'], categories=TRANSACTION_TYPES).codes
+        if (codes < 0).any():
+            unknown = sorted(set(df['type'][codes < 0]))
+            raise ValueError(f"Unknown transaction type(s): {unknown}")
+
+        X = self.reserve(len(df))
+        X[:, 0] = df['step'].to_numpy()
+        X[:, 1] = codes
+        for i, col in enumerate(INPUT_COLUMNS[2:], start=2):
+            X[:, i] = df[col].to_numpy()
+        X[:, 7] = (codes == TRANSFER_CODE) & (df['amount'].to_numpy() > FLAG_AMOUNT)
+        return X
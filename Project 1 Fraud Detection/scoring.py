@@ -0,0 +1,100 @@
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifact import DEFAULT_PIPELINE, input_dtype, load_model
+from features import INPUT_COLUMNS, FeatureEncoder
+from storage import TableWriter
+from telemetry import request, timer
+
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    if path.endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def score_array(model, X, threshold=DEFAULT_THRESHOLD):
+    probability = model.predict_proba(X)[:, 1]
+    return probability, (probability >= threshold).astype(np.int8)
+
+
+def score_file(model, input_path, output_path, threshold=DEFAULT_THRESHOLD,
+               chunksize=DEFAULT_CHUNKSIZE, keep=(), log_every=10, log=sys.stderr):
+    columns = INPUT_COLUMNS + [c for c in keep if c not in INPUT_COLUMNS]
+    encoder = FeatureEncoder(chunksize, input_dtype(model))
+    rows = 0
+    start = time.perf_counter()
+
+    empty = pd.DataFrame({'row': np.empty(0, dtype=np.int64)})
+    for col in keep:
+        empty[col] = pd.Series(dtype=object)
+    empty['fraud_probability'] = np.empty(0, dtype=np.float64)
+    empty['is_fraud'] = np.empty(0, dtype=np.int8)
+
+    chunks = read_chunks(input_path, chunksize, columns)
+    with TableWriter(output_path, empty) as writer:
+        for i in itertools.count(1):
+            with timer('score.read'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with request('score.chunk'):
+                with timer('score.encode'):
+                    X = encoder.encode_frame(chunk)
+                with timer('score.predict_proba'):
+                    probability, prediction = score_array(model, X, threshold)
+
+                with timer('score.write'):
+                    out = pd.DataFrame({'row': np.arange(rows, rows + len(chunk))})
+                    for col in keep:
+                        out[col] = chunk[col].to_numpy()
+                    out['fraud_probability'] = probability
+                    out['is_fraud'] = prediction
+                    writer.write(out)
+
+            rows += len(chunk)
+            if log is not None and log_every and i % log_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{rows:,} rows scored ({rows / elapsed:,.0f} rows/sec)", file=log)
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed else 0.0,
+    }
+    if log is not None:
+        print(f"Done: {rows:,} rows in {elapsed:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)", file=log)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a PaySim-format CSV/Parquet file with the fraud pipeline.")
+    parser.add_argument('input', help="Input .csv or .parquet file")
+    parser.add_argument('output', help="Output .csv or .parquet file")
+    parser.add_argument('--model', default=DEFAULT_PIPELINE,
+                        help="Pickled pipeline or an artifact directory written by artifact.py")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--keep', nargs='*', default=[],
+                        help="Input columns copied to the output (e.g. nameOrig nameDest)")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    score_file(model, args.input, args.output, threshold=args.threshold,
+               chunksize=args.chunksize, keep=args.keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from artifact import DEFAULT_PIPELINE, input_dtype, load_model
+from features import FeatureEncoder, transaction_row
+from scoring import DEFAULT_THRESHOLD
+from telemetry import incr, observe, request, snapshot, timer, to_prometheus
+from tree_eval import NumpyFraudModel
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+               500: 'Internal Server Error'}
+# Largest request body read into memory; a list of a few thousand transactions fits comfortably
+DEFAULT_MAX_BODY = 8 * 1024 * 1024
+
+
+class ServeStats:
+    # Request and batch counters only; latency lives in the shared registry's serve.request histogram
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    def record(self):
+        self.requests += 1
+
+    def record_batch(self, size):
+        self.batches += 1
+        self.batched_rows += size
+
+    def snapshot(self):
+        uptime = time.monotonic() - self.started
+        stages = snapshot()['stages']
+        latency = stages.get('serve.request', {})
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'avg_batch_size': self.batched_rows / self.batches if self.batches else 0.0,
+            'uptime_sec': uptime,
+            'throughput_rps': self.requests / uptime if uptime else 0.0,
+            'latency_p50_ms': latency.get('p50_ms', 0.0),
+            'latency_p99_ms': latency.get('p99_ms', 0.0),
+            'stages': stages,
+        }
+
+
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=64, max_wait_ms=2.0, threshold=DEFAULT_THRESHOLD, stats=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.threshold = threshold
+        self.stats = stats or ServeStats()
+        self._queue = None
+        self._task = None
+        # A single worker keeps predict_proba off the event loop without oversubscribing XGBoost's own threads
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._encoder = FeatureEncoder(max_batch_size, input_dtype(model))
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def score(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    def _predict(self, rows):
+        with request('serve.batch'):
+            with timer('serve.encode'):
+                X = self._encoder.encode_rows(rows)
+            with timer('serve.predict_proba'):
+                return self.model.predict_proba(X)[:, 1]
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = [row for row, _ in batch]
+            try:
+                probability = await loop.run_in_executor(self._executor, self._predict, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats.record_batch(len(batch))
+            incr('serve.batched_rows', len(batch))
+            for (_, future), p in zip(batch, probability):
+                if not future.done():
+                    p = float(p)
+                    future.set_result((p, int(p >= self.threshold)))
+
+
+def content_length(headers):
+    # None unless the header is plain decimal digits; int() alone would accept "-1", "+5" and "1_0"
+    value = headers.get('content-length', '0')
+    return int(value) if value.isascii() and value.isdigit() else None
+
+
+class BadRequest(Exception):
+    # A request that cannot be framed; it is answered and the connection closed, since the rest of it
+    # cannot be skipped reliably
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_head(reader):
+    # Request line and lower-cased headers, or None once the client has closed the connection.
+    # A line over the stream limit raises ValueError (readline) or LimitOverrunError.
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return request_line, headers
+
+
+class ScoringServer:
+    def __init__(self, batcher, max_body=DEFAULT_MAX_BODY):
+        self.batcher = batcher
+        self.stats = batcher.stats
+        self.max_body = max_body
+
+    async def score(self, body):
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            # Every row is validated before any is queued, so a bad one rejects the request cleanly
+            rows = [transaction_row(tx) for tx in payload]
+            results = await asyncio.gather(*(self.batcher.score(row) for row in rows))
+            return [{'fraud_probability': p, 'is_fraud': label} for p, label in results]
+        p, label = await self.batcher.score(transaction_row(payload))
+        return {'fraud_probability': p, 'is_fraud': label}
+
+    async def dispatch(self, method, path, body):
+        if path == '/score':
+            if method != 'POST':
+                return 405, {'error': 'Use POST'}
+            started = time.perf_counter()
+            try:
+                result = await self.score(body)
+            except ValueError as e:
+                self.stats.errors += 1
+                return 400, {'error': str(e)}
+            self.stats.record()
+            observe('serve.request', time.perf_counter() - started)
+            return 200, result
+        if path == '/metrics':
+            return 200, self.stats.snapshot()
+        if path == '/metrics/prometheus':
+            return 200, to_prometheus('fraud_serve')
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f"No route for {path}"}
+
+    async def read_request(self, reader):
+        # (method, path, version, headers, body) for the next request, or None when the client is done
+        try:
+            head = await read_head(reader)
+        except (asyncio.LimitOverrunError, ValueError):
+            raise BadRequest(400, "Request line or header too long") from None
+        if head is None:
+            return None
+        request_line, headers = head
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise BadRequest(400, "Malformed request line") from None
+        length = content_length(headers)
+        if length is None:
+            raise BadRequest(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise BadRequest(413, f"Body exceeds {self.max_body} bytes")
+        return method, path, version, headers, await reader.readexactly(length)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    parsed = await self.read_request(reader)
+                    if parsed is None:
+                        break
+                    method, path, version, headers, body = parsed
+                except BadRequest as e:
+                    self.stats.errors += 1
+                    status, payload, keep_alive = e.status, {'error': str(e)}, False
+                else:
+                    try:
+                        status, payload = await self.dispatch(method, path, body)
+                    except Exception as e:
+                        self.stats.errors += 1
+                        status, payload = 500, {'error': str(e)}
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                # Routes return text (Prometheus exposition) or a JSON-serialisable payload
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(payload).encode(), 'application/json'
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(model, host='0.0.0.0', port=8000, max_batch_size=64, max_wait_ms=2.0, threshold=DEFAULT_THRESHOLD,
+                max_body=DEFAULT_MAX_BODY):
+    batcher = MicroBatcher(model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, threshold=threshold)
+    batcher.start()
+    app = ScoringServer(batcher, max_body=max_body)
+    server = await asyncio.start_server(app.handle, host, port, backlog=1024)
+    print(f"Serving fraud scoring on http://{host}:{port} "
+          f"(max_batch_size={max_batch_size}, max_wait_ms={max_wait_ms})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP scoring service for the fraud pipeline.")
+    parser.add_argument('--model', default=DEFAULT_PIPELINE,
+                        help="Pickled pipeline or an artifact directory written by artifact.py")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--max-body-bytes', type=int, default=DEFAULT_MAX_BODY,
+                        help="Larger requests are answered with 413 without reading the body")
+    parser.add_argument('--engine', choices=['xgboost', 'numpy'], default='xgboost',
+                        help="numpy uses tree_eval's flattened trees, which avoids runtime overhead on small batches")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    if args.engine == 'numpy':
+        model = NumpyFraudModel.from_model(model)
+    try:
+        asyncio.run(serve(model, args.host, args.port, args.max_batch_size, args.max_wait_ms, args.threshold,
+                          args.max_body_bytes))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from artifact import DEFAULT_ARTIFACT_DIR, write_artifact
+from dataset import DEFAULT_CACHE_DIR, DEFAULT_CSV, load_cache, open_cache
+from features import FEATURE_COLUMNS, N_FEATURES
+from telemetry import stage, stage_timings
+
+# Same search space as the GridSearchCV cell in train.ipynb
+PARAM_GRID = {
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'n_estimators': [100, 200],
+}
+BATCH_ROWS = 500_000
+
+
+def stratified_split(y, test_size, seed):
+    rng = np.random.default_rng(seed)
+    train, test = [], []
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        rng.shuffle(idx)
+        n_test = int(round(len(idx) * test_size))
+        test.append(idx[:n_test])
+        train.append(idx[n_test:])
+    # Sorted indices keep memory-mapped reads sequential
+    return np.sort(np.concatenate(train)), np.sort(np.concatenate(test))
+
+
+def stratified_folds(y, n_folds, seed):
+    # Each class is shuffled and dealt round-robin into folds, as StratifiedKFold(shuffle=True) does;
+    # returns sorted (fit, val) positions per fold
+    rng = np.random.default_rng(seed)
+    fold_of = np.empty(len(y), dtype=np.int16)
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        rng.shuffle(idx)
+        fold_of[idx] = np.arange(len(idx)) % n_folds
+    return [(np.flatnonzero(fold_of != k), np.flatnonzero(fold_of == k)) for k in range(n_folds)]
+
+
+def gather(columns, index):
+    X = np.empty((len(index), N_FEATURES), dtype=np.float32)
+    for i, col in enumerate(FEATURE_COLUMNS):
+        X[:, i] = columns[col][index]
+    return X
+
+
+def make_dmatrix(columns, index, cache_prefix=None):
+    import xgboost
+
+    class CacheIter(xgboost.DataIter):
+        def __init__(self):
+            self._start = 0
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._start >= len(index):
+                return False
+            batch = index[self._start:self._start + BATCH_ROWS]
+            input_data(data=gather(columns, batch), label=columns['isFraud'][batch])
+            self._start += BATCH_ROWS
+            return True
+
+        def reset(self):
+            self._start = 0
+
+    # With a cache_prefix XGBoost pages the quantised data to disk (external memory);
+    # without one it still streams batches into a compact QuantileDMatrix.
+    if cache_prefix:
+        return xgboost.DMatrix(CacheIter())
+    return xgboost.QuantileDMatrix(CacheIter())
+
+
+def predict_batches(booster, columns, index):
+    out = np.empty(len(index), dtype=np.float32)
+    for start in range(0, len(index), BATCH_ROWS):
+        batch = index[start:start + BATCH_ROWS]
+        out[start:start + len(batch)] = booster.inplace_predict(gather(columns, batch))
+    return out
+
+
+def evaluate(y_true, proba, threshold=0.5):
+    from sklearn.metrics import average_precision_score, f1_score, roc_auc_score
+
+    y_pred = (proba >= threshold).astype(np.int8)
+    return {
+        'f1': f1_score(y_true, y_pred),
+        'pr_auc': average_precision_score(y_true, proba),
+        'roc_auc': roc_auc_score(y_true, proba),
+    }
+
+
+# Worker state: each process opens the memory-mapped cache once and keeps the DMatrix of the fold it
+# last trained on. Tasks are queued fold by fold, so that is rebuilt about once per fold, not per config.
+_worker = {}
+
+
+def _init_worker(cache_dir, split_dir, nthread, external_memory):
+    _worker.update(columns=load_cache(cache_dir), split_dir=split_dir, nthread=nthread,
+                   external_memory=external_memory, fold=None)
+
+
+def _use_fold(fold):
+    if _worker['fold'] == fold:
+        return
+    columns, split_dir = _worker['columns'], _worker['split_dir']
+    fit_idx = np.load(os.path.join(split_dir, f'fold{fold}-fit.npy'), mmap_mode='r')
+    val_idx = np.load(os.path.join(split_dir, f'fold{fold}-val.npy'), mmap_mode='r')
+    prefix = os.path.join(split_dir, f'xgb-{os.getpid()}-fold{fold}') if _worker['external_memory'] else None
+    # The previous fold's DMatrix is released before the next one is built
+    _worker.update(fold=None, dtrain=None)
+    _worker.update(fold=fold, val_idx=val_idx, y_val=np.asarray(columns['isFraud'][val_idx]),
+                   dtrain=make_dmatrix(columns, fit_idx, prefix))
+
+
+def _fit_config(params, fold, base_params, threshold):
+    import xgboost
+
+    _use_fold(fold)
+    start = time.perf_counter()
+    train_params = dict(base_params, nthread=_worker['nthread'],
+                        max_depth=params['max_depth'], learning_rate=params['learning_rate'])
+    booster = xgboost.train(train_params, _worker['dtrain'], num_boost_round=params['n_estimators'])
+    fit_seconds = time.perf_counter() - start
+    proba = predict_batches(booster, _worker['columns'], _worker['val_idx'])
+    return dict(params, fold=fold, fit_seconds=fit_seconds, **evaluate(_worker['y_val'], proba, threshold))
+
+
+def parameter_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def summarize_search(results):
+    # Per config, each metric averaged over its folds; best mean F1 first, as GridSearchCV ranks
+    runs = {}
+    for r in results:
+        runs.setdefault(tuple(r[k] for k in PARAM_GRID), []).append(r)
+    summary = []
+    for key, folds in runs.items():
+        row = dict(zip(PARAM_GRID, key))
+        for metric in ('f1', 'pr_auc', 'roc_auc', 'fit_seconds'):
+            row[metric] = float(np.mean([r[metric] for r in folds]))
+        row['f1_std'] = float(np.std([r['f1'] for r in folds]))
+        summary.append(row)
+    return sorted(summary, key=lambda r: r['f1'], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Out-of-core XGBoost training for the PaySim fraud model.")
+    parser.add_argument('--data', default=DEFAULT_CSV)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--out', default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument('--test-size', type=float, default=0.3)
+    parser.add_argument('--folds', type=int, default=3,
+                        help="Stratified folds of the training split for the grid search (the notebook's GridSearchCV cv=3)")
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--external-memory', action='store_true',
+                        help="Page the training DMatrix to disk instead of holding it in RAM")
+    parser.add_argument('--threshold', type=float, default=0.3,
+                        help="Decision threshold for the search's F1, the test report and the exported artifact")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    if args.folds < 2:
+        parser.error("--folds must be at least 2")
+
+    with stage('ingest'):
+        columns = open_cache(args.data, args.cache_dir)
+        y = np.asarray(columns['isFraud'])
+        print(f"  {len(y):,} rows, fraud rate {y.mean():.4%}")
+
+    with stage('split'):
+        train_idx, test_idx = stratified_split(y, args.test_size, args.seed)
+        split_dir = os.path.join(args.cache_dir, 'splits')
+        os.makedirs(split_dir, exist_ok=True)
+        for fold, (fit_pos, val_pos) in enumerate(stratified_folds(y[train_idx], args.folds, args.seed)):
+            np.save(os.path.join(split_dir, f'fold{fold}-fit.npy'), train_idx[fit_pos])
+            np.save(os.path.join(split_dir, f'fold{fold}-val.npy'), train_idx[val_pos])
+
+    # Class weighting stands in for the notebook's SMOTE, which needs the whole training set in memory
+    n_pos = int(y[train_idx].sum())
+    base_params = {
+        'objective': 'binary:logistic',
+        'tree_method': 'hist',
+        'eval_metric': 'aucpr',
+        'scale_pos_weight': (len(train_idx) - n_pos) / max(n_pos, 1),
+        'seed': args.seed,
+    }
+
+    with stage('search'):
+        # Every (fold, config) pair is one task, queued fold by fold
+        tasks = [(config, fold) for fold in range(args.folds) for config in parameter_grid(PARAM_GRID)]
+        nthread = max(1, (os.cpu_count() or 1) // args.workers)
+        with ProcessPoolExecutor(
+            max_workers=args.workers, initializer=_init_worker,
+            initargs=(args.cache_dir, split_dir, nthread, args.external_memory),
+        ) as pool:
+            results = list(pool.map(_fit_config, *zip(*tasks), itertools.repeat(base_params),
+                                    itertools.repeat(args.threshold)))
+        summary = summarize_search(results)
+        print(f"  {args.folds}-fold means, F1 at threshold {args.threshold}:")
+        for r in summary:
+            print(f"  depth={r['max_depth']} lr={r['learning_rate']:<5} n={r['n_estimators']:<4}"
+                  f" f1={r['f1']:.4f} ±{r['f1_std']:.4f} pr_auc={r['pr_auc']:.4f} fit={r['fit_seconds']:.1f}s")
+        best = {k: summary[0][k] for k in PARAM_GRID}
+        print(f"  best: {best}")
+
+    with stage('final_fit'):
+        import xgboost
+
+        prefix = os.path.join(split_dir, 'xgb-final') if args.external_memory else None
+        dtrain = make_dmatrix(columns, train_idx, prefix)
+        params = dict(base_params, max_depth=best['max_depth'], learning_rate=best['learning_rate'])
+        booster = xgboost.train(params, dtrain, num_boost_round=best['n_estimators'])
+
+    with stage('evaluate'):
+        proba = predict_batches(booster, columns, test_idx)
+        metrics = evaluate(y[test_idx], proba, args.threshold)
+        print(f"  test @ threshold {args.threshold}: " + ", ".join(f"{k}={v:.4f}" for k, v in metrics.items()))
+
+    with stage('export'):
+        # Trees are scale-invariant, so the model is trained on raw features and exported with an identity scaler
+        write_artifact(booster, np.zeros(N_FEATURES), np.ones(N_FEATURES), args.out, threshold=args.threshold)
+        print(f"  wrote {args.out}/")
+
+    print("\nStage timings:")
+    for name, seconds in stage_timings().items():
+        print(f"  {name:<10}{seconds:>10.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import json
+import os
+
+import numpy as np
+
+from artifact import FraudModel, read_metadata, scaler_params, split_pipeline, standardize
+
+# Upper bound on rows x trees node indices held at once while traversing
+MAX_CELLS = 4_000_000
+
+
+def parse_base_score(value):
+    # Stored as "5E-1" by XGBoost 2.x and "[5E-1]" by 3.x
+    return float(str(value).strip('[]'))
+
+
+class TreeEnsemble:
+    # All trees of a binary:logistic gbtree flattened into contiguous node arrays. Leaves point to
+    # themselves, so every row can be stepped max_depth times without tracking which have finished.
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, max_depth, base_margin):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+
+    @classmethod
+    def from_json(cls, model, iteration_range=(0, 0)):
+        learner = model['learner']
+        objective = learner['objective']['name']
+        booster = learner['gradient_booster']
+        if objective != 'binary:logistic' or booster['name'] != 'gbtree':
+            raise ValueError(f"Only binary:logistic gbtree models are supported, got {objective}/{booster['name']}")
+
+        trees = booster['model']['trees']
+        num_parallel_tree = int(booster['model']['gbtree_model_param'].get('num_parallel_tree', 1))
+        begin, end = iteration_range
+        if end:
+            trees = trees[begin * num_parallel_tree:end * num_parallel_tree]
+
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if any(tree.get('split_type', [])):
+                raise ValueError("Categorical splits are not supported")
+            lc = np.asarray(tree['left_children'], dtype=np.int32)
+            rc = np.asarray(tree['right_children'], dtype=np.int32)
+            cond = np.asarray(tree['split_conditions'], dtype=np.float32)
+            is_leaf = lc == -1
+            own = np.arange(offset, offset + len(lc), dtype=np.int32)
+
+            feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+            threshold.append(np.where(is_leaf, 0, cond).astype(np.float32))
+            left.append(np.where(is_leaf, own, lc + offset))
+            right.append(np.where(is_leaf, own, rc + offset))
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            # XGBoost keeps leaf values in split_conditions for leaf nodes
+            value.append(np.where(is_leaf, cond, 0).astype(np.float32))
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree_depth(lc, rc))
+            offset += len(lc)
+
+        base_score = parse_base_score(learner['learner_model_param']['base_score'])
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold),
+            np.concatenate(left), np.concatenate(right),
+            np.concatenate(default_left), np.concatenate(value),
+            np.asarray(roots, dtype=np.int32), max_depth,
+            float(np.log(base_score / (1 - base_score))),
+        )
+
+    @classmethod
+    def from_booster(cls, booster, iteration_range=(0, 0)):
+        return cls.from_json(json.loads(booster.save_raw('json')), iteration_range)
+
+    def margin(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_trees = len(self.roots)
+        out = np.full(len(X), self.base_margin)
+        chunk = max(1, MAX_CELLS // max(n_trees, 1))
+
+        for start in range(0, len(X), chunk):
+            block = X[start:start + chunk]
+            rows = np.arange(len(block))[:, None]
+            node = np.broadcast_to(self.roots, (len(block), n_trees)).copy()
+            for _ in range(self.max_depth):
+                x = block[rows, self.feature[node]]
+                go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+                node = np.where(go_left, self.left[node], self.right[node])
+            out[start:start + len(block)] += self.value[node].sum(axis=1, dtype=np.float64)
+        return out
+
+
+def tree_depth(left, right):
+    depth = 0
+    level = np.array([0])
+    while True:
+        level = level[left[level] != -1]
+        if not len(level):
+            return depth
+        level = np.concatenate([left[level], right[level]])
+        depth += 1
+
+
+class NumpyFraudModel:
+    input_dtype = np.float32
+
+    def __init__(self, ensemble, mean, scale):
+        self.ensemble = ensemble
+        self.mean = mean
+        self.scale = scale
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        scaler, clf = split_pipeline(pipeline)
+        booster = clf.get_booster()
+        best_iteration = booster.attr('best_iteration')
+        iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+        return cls(TreeEnsemble.from_booster(booster, iteration_range), *scaler_params(scaler))
+
+    @classmethod
+    def from_artifact(cls, path):
+        metadata = read_metadata(path)
+        iteration_range = tuple(metadata.get('iteration_range', (0, 0)))
+        model_path = os.path.join(path, metadata['model_file'])
+        # JSON artifacts are read directly, so scoring needs neither sklearn nor xgboost
+        if model_path.endswith('.json'):
+            with open(model_path) as f:
+                ensemble = TreeEnsemble.from_json(json.load(f), iteration_range)
+        else:
+            ensemble = TreeEnsemble.from_booster(FraudModel.load(path).booster, iteration_range)
+        return cls(ensemble, np.asarray(metadata['mean']), np.asarray(metadata['scale']))
+
+    @classmethod
+    def from_model(cls, model):
+        if isinstance(model, FraudModel):
+            return cls(TreeEnsemble.from_booster(model.booster, model.iteration_range), model.mean, model.scale)
+        return cls.from_pipeline(model)
+
+    def predict_proba(self, X):
+        margin = self.ensemble.margin(standardize(X, self.mean, self.scale))
+        p = 1 / (1 + np.exp(-margin))
+        return np.column_stack([1 - p, p])
@@ -0,0 +1,269 @@
+import argparse
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from scoring import read_chunks
+from telemetry import timed
+
+DEFAULT_WINDOW = 24
+VELOCITY_COLUMNS = ['orig_tx_count', 'orig_amount_sum', 'orig_drain_ratio', 'dest_tx_count', 'dest_amount_sum']
+REPLAY_COLUMNS = ['step', 'amount', 'nameOrig', 'oldbalanceOrg', 'newbalanceOrig', 'nameDest']
+
+
+def drain_ratio(oldbalance, newbalance):
+    # Share of the origin balance a transaction took out, in [0, 1]
+    oldbalance = np.asarray(oldbalance, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(oldbalance > 0, (oldbalance - np.asarray(newbalance)) / oldbalance, 0.0)
+    return np.clip(ratio, 0.0, 1.0)
+
+
+class AccountWindowStore:
+    # Rolling per-account counters over the last `window` steps. Each account owns one row of
+    # fixed-size arrays with one bucket per step (bucket = step % window), so an update touches a
+    # single cell and a query sums `window` cells regardless of history length. Accounts idle for
+    # `ttl` steps are evicted and their rows reused; ttl may not be shorter than the window, or an
+    # account would be forgotten while its buckets still count.
+    def __init__(self, window=DEFAULT_WINDOW, ttl=None, capacity=1024):
+        ttl = window if ttl is None else ttl
+        if ttl < window:
+            raise ValueError(f"ttl must be at least the window ({window} steps), got {ttl}")
+        self.window = window
+        self.ttl = ttl
+        self.slots = {}
+        self.accounts = [''] * capacity
+        self.free = list(range(capacity - 1, -1, -1))
+        self.bucket_step = np.full((capacity, window), -1, dtype=np.int32)
+        self.count = np.zeros((capacity, window), dtype=np.int32)
+        self.amount = np.zeros((capacity, window), dtype=np.float64)
+        self.drain = np.zeros((capacity, window), dtype=np.float32)
+        self.last_step = np.full(capacity, -1, dtype=np.int32)
+        self.evicted_through = -1
+        # step -> slots updated at that step, so eviction only visits accounts that may have gone idle
+        self.expiry = {}
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _grow(self):
+        old = len(self.last_step)
+        new = old * 2
+        for name in ('bucket_step', 'count', 'amount', 'drain'):
+            arr = getattr(self, name)
+            grown = np.full((new, self.window), -1 if name == 'bucket_step' else 0, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        last_step = np.full(new, -1, dtype=np.int32)
+        last_step[:old] = self.last_step
+        self.last_step = last_step
+        self.accounts.extend([''] * old)
+        self.free.extend(range(new - 1, old - 1, -1))
+
+    def _slot(self, account):
+        slot = self.slots.get(account)
+        if slot is None:
+            if not self.free:
+                self._grow()
+            slot = self.free.pop()
+            self.slots[account] = slot
+            self.accounts[slot] = account
+            self.bucket_step[slot] = -1
+        return slot
+
+    def _open_bucket(self, slots, step):
+        # Returns the bucket for `step` and which of `slots` may write to it. A bucket already holding
+        # a later step is at least a window ahead, so a late row is dropped instead of wiping it.
+        b = step % self.window
+        current = self.bucket_step[slots, b]
+        stale = slots[current < step]
+        self.bucket_step[stale, b] = step
+        self.count[stale, b] = 0
+        self.amount[stale, b] = 0
+        self.drain[stale, b] = 0
+        return b, current <= step
+
+    def update(self, account, step, amount, drain=0.0):
+        slot = self._slot(account)
+        b = step % self.window
+        if self.bucket_step[slot, b] > step:
+            return
+        if self.bucket_step[slot, b] != step:
+            self.bucket_step[slot, b] = step
+            self.count[slot, b] = 0
+            self.amount[slot, b] = 0
+            self.drain[slot, b] = 0
+        self.count[slot, b] += 1
+        self.amount[slot, b] += amount
+        self.drain[slot, b] += drain
+        if step > self.last_step[slot]:
+            self.last_step[slot] = step
+            self.expiry.setdefault(step, []).append(slot)
+        self.maybe_evict(step)
+
+    def update_batch(self, accounts, steps, amounts, drains=None):
+        steps = np.asarray(steps)
+        order = np.argsort(steps, kind='stable')
+        accounts = [accounts[i] for i in order.tolist()]
+        steps, amounts = steps[order], np.asarray(amounts, dtype=np.float64)[order]
+        drains = np.zeros(len(steps)) if drains is None else np.asarray(drains)[order]
+
+        # Rows within one step share a bucket, so each step is a single vectorised scatter-add. Idle
+        # accounts are evicted at every step boundary, as update() does, before the step's slots are
+        # looked up, so a slot freed mid-batch is reused rather than written through a stale lookup.
+        bounds = np.flatnonzero(np.diff(steps)) + 1
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(steps)]):
+            step = int(steps[lo])
+            self.maybe_evict(step)
+            group = np.fromiter((self._slot(a) for a in accounts[lo:hi]), dtype=np.int64, count=hi - lo)
+            b, keep = self._open_bucket(group, step)
+            group = group[keep]
+            np.add.at(self.count[:, b], group, 1)
+            np.add.at(self.amount[:, b], group, amounts[lo:hi][keep])
+            np.add.at(self.drain[:, b], group, drains[lo:hi][keep])
+            group = group[self.last_step[group] < step]
+            self.last_step[group] = step
+            self.expiry.setdefault(step, []).extend(group.tolist())
+
+    def query(self, account, step):
+        slot = self.slots.get(account)
+        if slot is None:
+            return 0, 0.0, 0.0
+        live = (self.bucket_step[slot] > step - self.window) & (self.bucket_step[slot] <= step)
+        return (
+            int(self.count[slot][live].sum()),
+            float(self.amount[slot][live].sum()),
+            float(self.drain[slot][live].sum()),
+        )
+
+    def maybe_evict(self, step):
+        # Runs once per step boundary and only visits slots queued at the expired steps, so the cost is
+        # proportional to the updates being retired rather than to the store's capacity. Queue entries
+        # are not removed when an account is updated again; last_step tells which are still current.
+        if step - self.ttl <= self.evicted_through:
+            return 0
+        self.evicted_through = step - self.ttl
+        expired = [s for s in self.expiry if s <= self.evicted_through]
+        if not expired:
+            return 0
+        queued = np.unique(np.fromiter(
+            itertools.chain.from_iterable(self.expiry.pop(s) for s in expired), dtype=np.int64))
+        stale = queued[(self.last_step[queued] >= 0) & (self.last_step[queued] <= self.evicted_through)]
+        for slot in stale.tolist():
+            del self.slots[self.accounts[slot]]
+            self.accounts[slot] = ''
+            self.free.append(slot)
+        self.last_step[stale] = -1
+        return len(stale)
+
+    def state(self, prefix):
+        return {
+            f'{prefix}_accounts': np.array(self.accounts, dtype=str),
+            f'{prefix}_bucket_step': self.bucket_step,
+            f'{prefix}_count': self.count,
+            f'{prefix}_amount': self.amount,
+            f'{prefix}_drain': self.drain,
+            f'{prefix}_last_step': self.last_step,
+            f'{prefix}_meta': np.array([self.window, self.ttl, self.evicted_through]),
+        }
+
+    @classmethod
+    def from_state(cls, data, prefix):
+        window, ttl, evicted_through = (int(v) for v in data[f'{prefix}_meta'])
+        store = cls(window, ttl, capacity=1)
+        store.bucket_step = data[f'{prefix}_bucket_step']
+        store.count = data[f'{prefix}_count']
+        store.amount = data[f'{prefix}_amount']
+        store.drain = data[f'{prefix}_drain']
+        store.last_step = data[f'{prefix}_last_step']
+        store.evicted_through = evicted_through
+        store.accounts = data[f'{prefix}_accounts'].tolist()
+        store.slots = {a: i for i, a in enumerate(store.accounts) if a}
+        store.free = [i for i in range(len(store.accounts) - 1, -1, -1) if not store.accounts[i]]
+        live = np.flatnonzero(store.last_step >= 0)
+        for slot, step in zip(live.tolist(), store.last_step[live].tolist()):
+            store.expiry.setdefault(step, []).append(slot)
+        return store
+
+
+class VelocityFeatureStore:
+    def __init__(self, window=DEFAULT_WINDOW, ttl=None):
+        self.orig = AccountWindowStore(window, ttl)
+        self.dest = AccountWindowStore(window, ttl)
+
+    def features(self, tx):
+        step = int(tx['step'])
+        count, amount, drain = self.orig.query(tx['nameOrig'], step)
+        dest_count, dest_amount, _ = self.dest.query(tx['nameDest'], step)
+        return np.array([count, amount, drain / count if count else 0.0, dest_count, dest_amount], dtype=np.float32)
+
+    def update(self, tx):
+        step = int(tx['step'])
+        amount = float(tx['amount'])
+        drain = float(drain_ratio(tx['oldbalanceOrg'], tx['newbalanceOrig']))
+        self.orig.update(tx['nameOrig'], step, amount, drain)
+        self.dest.update(tx['nameDest'], step, amount)
+
+    def features_and_update(self, tx):
+        # Features describe history before this transaction, so they never leak the row being scored
+        row = self.features(tx)
+        self.update(tx)
+        return row
+
+    def update_frame(self, df):
+        steps = df['step'].to_numpy()
+        amounts = df['amount'].to_numpy()
+        self.orig.update_batch(df['nameOrig'].tolist(), steps, amounts,
+                               drain_ratio(df['oldbalanceOrg'], df['newbalanceOrig']))
+        self.dest.update_batch(df['nameDest'].tolist(), steps, amounts)
+
+    @timed('velocity.replay')
+    def replay(self, path, chunksize=500_000, log=sys.stderr):
+        rows = 0
+        start = time.perf_counter()
+        for chunk in read_chunks(path, chunksize, REPLAY_COLUMNS):
+            self.update_frame(chunk)
+            rows += len(chunk)
+            if log is not None:
+                elapsed = time.perf_counter() - start
+                print(f"{rows:,} rows replayed ({rows / elapsed:,.0f} rows/sec), "
+                      f"{len(self.orig):,} origin / {len(self.dest):,} destination accounts live", file=log)
+        return rows
+
+    @timed('velocity.save')
+    def save(self, path):
+        np.savez(path, **self.orig.state('orig'), **self.dest.state('dest'))
+
+    @classmethod
+    @timed('velocity.load')
+    def load(cls, path):
+        with np.load(path) as data:
+            store = cls()
+            store.orig = AccountWindowStore.from_state(data, 'orig')
+            store.dest = AccountWindowStore.from_state(data, 'dest')
+        return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild per-account velocity state from a historical PaySim file.")
+    parser.add_argument('input', help="Historical .csv or .parquet file, ordered by step")
+    parser.add_argument('--state', default='velocity_state.npz', help="Where to save the rebuilt state")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Rolling window in steps (hours)")
+    parser.add_argument('--ttl', type=int, default=None, help="Evict accounts idle for this many steps (default: window)")
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args(argv)
+    if args.ttl is not None and args.ttl < args.window:
+        parser.error("--ttl must be at least --window")
+
+    store = VelocityFeatureStore(args.window, args.ttl)
+    start = time.perf_counter()
+    rows = store.replay(args.input, args.chunksize)
+    elapsed = time.perf_counter() - start
+    store.save(args.state)
+    print(f"Replayed {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/sec) -> {args.state}")
+
+
+if __name__ == "__main__":
+    main()
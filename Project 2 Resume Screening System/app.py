@@ -1,15 +1,12 @@
+import os
 import streamlit as st
-import pandas as pd
-import numpy as np
-import spacy
-import re
-import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from PyPDF2 import PdfReader
-from docx import Document
-from sklearn.metrics.pairwise import cosine_similarity
-import en_core_web_sm
-import matplotlib.pyplot as plt
+from text_cache import TextCache
+from preprocess import Preprocessor, cache_namespace, load_nlp
+from documents import read_docx, read_pdf, read_txt
+from warmup import BackgroundLoader
+from charts import bar_chart_svg, gauge_svg, top_roles
+from storage import current_version
+from telemetry import request, summary_rows, timed, timer, to_json, to_prometheus
 
 # Page config
 st.set_page_config(
@@ -19,73 +16,85 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+def load_pickle(path):
+    import joblib
+    return joblib.load(path)
+
+# The memory-mapped export from compact_model.py is preferred when present; it gives the same outputs
+COMPACT_MODEL_DIR = os.environ.get('RESUME_MODEL_DIR', 'resume_model')
+
+@timed('resume_app.load_classifier')
+def load_classifier(compact_dir):
+    if compact_dir is not None:
+        from compact_model import CompactClassifier
+        return CompactClassifier.load(compact_dir)
+    return load_pickle('resume_classifier.pkl')
+
+@timed('resume_app.load_vectorizer')
+def load_vectorizer(compact_dir):
+    if compact_dir is not None:
+        from compact_model import CompactVectorizer
+        return CompactVectorizer.load(compact_dir)
+    return load_pickle('tfidf_vectorizer.pkl')
+
+# Heavy modules and models load in a background thread from the first page view;
+# the first analysis waits only for whatever is not ready yet.
 @st.cache_resource
 def load_models():
-    try:
-        model = joblib.load('resume_classifier.pkl')
-        tfidf = joblib.load('tfidf_vectorizer.pkl')
-        nlp = spacy.load('en_core_web_sm')
-        return model, tfidf, nlp
-    except Exception as e:
-        st.error(f"Error loading models: {str(e)}")
-        return None, None, None
+    # The export's CURRENT pointer is read once here, so both loaders open the same version
+    # even if compact_model.py publishes a new one while they run
+    compact_dir = current_version(COMPACT_MODEL_DIR) if os.path.isdir(COMPACT_MODEL_DIR) else None
+    return BackgroundLoader({
+        'nlp': timed('resume_app.load_nlp')(load_nlp),
+        'model': lambda: load_classifier(compact_dir),
+        'tfidf': lambda: load_vectorizer(compact_dir),
+    })
 
-model, tfidf, nlp = load_models()
+models = load_models()
 
+@st.cache_resource
+def load_text_cache(namespace):
+    return TextCache(
+        maxsize=int(os.environ.get('PREPROCESS_CACHE_SIZE', 2048)),
+        path=os.environ.get('PREPROCESS_CACHE_DB'),
+        namespace=namespace
+    )
+
+text_cache = load_text_cache(cache_namespace())
+
+@st.cache_resource
+def load_preprocessor():
+    return Preprocessor(models.get('nlp'), cache=text_cache)
+
+@timed('resume_app.preprocess')
 def preprocess_text(text):
-    text = text.lower()
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-    text = re.sub(r'\S+@\S+', '', text)
-    text = re.sub(r'[0-9]+', '', text)  
-    doc = nlp(text)
-    tokens = [token.lemma_ for token in doc if not token.is_punct]
-    return ' '.join(tokens)
-
-def read_pdf(file):
-    reader = PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text()
-    return text
-
-def read_docx(file):
-    doc = Document(file)
-    return "\n".join([para.text for para in doc.paragraphs])
-
-def read_txt(file):
-    return file.read().decode("utf-8")
+    return load_preprocessor()(text)
 
+@timed('resume_app.similarity')
 def calculate_similarity(jd_text, resume_text):
+    from sklearn.metrics.pairwise import cosine_similarity
+    from ranking import final_score
+
+    tfidf = models.get('tfidf')
     jd_processed = preprocess_text(jd_text)
     resume_processed = preprocess_text(resume_text)
 
     vectors = tfidf.transform([jd_processed, resume_processed])
     similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
-    similarity_percent = round(similarity * 100, 2)
 
     jd_keywords = set(jd_processed.split())
     resume_keywords = set(resume_processed.split())
     matched_keywords = jd_keywords.intersection(resume_keywords)
     keyword_match_ratio = len(matched_keywords) / len(jd_keywords) if jd_keywords else 0
 
-    final_score = 0.7 * similarity_percent + 0.3 * (keyword_match_ratio * 100)
+    return final_score(similarity, keyword_match_ratio), list(matched_keywords)[:10]
 
-    return round(final_score, 2), list(matched_keywords)[:10]
+def render_svg(svg):
+    st.markdown(f'<div style="text-align:center">{svg}</div>', unsafe_allow_html=True)
 
+@timed('resume_app.render_gauge')
 def plot_similarity_gauge(similarity_score):
-    fig, ax = plt.subplots(figsize=(3, 2.5))
-    wedges, _ = ax.pie(
-        [similarity_score, 100 - similarity_score],
-        startangle=90,
-        colors=['#4CAF50' if similarity_score >= 75 else '#F44336', '#e0e0e0'],
-        radius=1.2,
-        wedgeprops=dict(width=0.3)
-    )
-    ax.text(0, 0, f"{similarity_score}%", ha='center', va='center', fontsize=14, weight='bold')
-    ax.set_aspect('equal')
-    plt.axis('off')
-    plt.tight_layout()
-    st.pyplot(fig)
+    render_svg(gauge_svg(similarity_score))
 
 # Main app
 def main():
@@ -142,12 +151,13 @@ def main():
         resume_file = st.file_uploader("Upload Resume (PDF, DOCX, TXT):", type=['pdf', 'docx', 'txt'], key="resume")
 
     if jd_file is not None:
-        if jd_file.type == "application/pdf":
-            jd_text = read_pdf(jd_file)
-        elif jd_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            jd_text = read_docx(jd_file)
-        else:
-            jd_text = read_txt(jd_file)
+        with timer('resume_app.parse_jd'):
+            if jd_file.type == "application/pdf":
+                jd_text = read_pdf(jd_file)
+            elif jd_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+                jd_text = read_docx(jd_file)
+            else:
+                jd_text = read_txt(jd_file)
         st.session_state.jd_text = jd_text
 
     if 'jd_text' in st.session_state:
@@ -155,19 +165,25 @@ def main():
 
     if st.button("Analyze Resume", key="analyze"):
         if (jd_text or 'jd_text' in st.session_state) and resume_file is not None:
-            with st.spinner("Processing documents..."):
+            with st.spinner("Processing documents..."), request('resume_app.analyze'):
                 try:
-                    if resume_file.type == "application/pdf":
-                        resume_text = read_pdf(resume_file)
-                    elif resume_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                        resume_text = read_docx(resume_file)
-                    else:
-                        resume_text = read_txt(resume_file)
-
+                    with timer('resume_app.parse_resume'):
+                        if resume_file.type == "application/pdf":
+                            resume_text = read_pdf(resume_file)
+                        elif resume_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+                            resume_text = read_docx(resume_file)
+                        else:
+                            resume_text = read_txt(resume_file)
+
+                    with timer('resume_app.wait_for_models'):
+                        model = models.get('model')
+                        tfidf = models.get('tfidf')
                     processed_resume = preprocess_text(resume_text)
-                    resume_vector = tfidf.transform([processed_resume])
-                    prediction = model.predict(resume_vector)[0]
-                    prediction_proba = model.predict_proba(resume_vector)[0]
+                    with timer('resume_app.transform'):
+                        resume_vector = tfidf.transform([processed_resume])
+                    with timer('resume_app.predict_proba'):
+                        prediction = model.predict(resume_vector)[0]
+                        prediction_proba = model.predict_proba(resume_vector)[0]
 
                     current_jd_text = jd_text if jd_text else st.session_state.jd_text
 
@@ -183,22 +199,8 @@ def main():
                     with col1:
                         st.markdown("**Resume Classification**")
                         st.markdown(f"Predicted Role: **{prediction}**")
-                        proba_df = pd.DataFrame({
-                            'Category': model.classes_,
-                            'Probability': prediction_proba
-                        }).sort_values('Probability', ascending=False)
-
-                        fig, ax = plt.subplots(figsize=(6, 4.5))
-                        top_probs = proba_df.sort_values(by='Probability', ascending=False).head(5)
-
-                        ax.bar(top_probs['Category'], top_probs['Probability'], color='royalblue')
-                        ax.set_ylabel('Probability', fontsize=12)
-                        ax.set_title('Top 5 Roles', fontsize=14)
-                        ax.set_xticklabels(top_probs['Category'], rotation=45, ha='right', color='black')
-                        ax.tick_params(axis='y', colors='black')
-                        ax.tick_params(axis='x', colors='black')
-                        plt.tight_layout()
-                        st.pyplot(fig)
+                        with timer('resume_app.render_roles'):
+                            render_svg(bar_chart_svg(top_roles(model.classes_, prediction_proba)))
 
 
                     with col2:
@@ -233,5 +235,18 @@ def main():
         else:
             st.warning("Please provide both a Job Description and a Resume to analyze.")
 
+    cache_stats = text_cache.stats()
+    st.sidebar.markdown("---")
+    st.sidebar.caption(
+        f"Preprocessing cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits, "
+        f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
+    )
+
+    # Per-stage latency for this server process, shared by all sessions
+    with st.sidebar.expander("Latency"):
+        st.dataframe(summary_rows(), hide_index=True)
+        st.download_button("Metrics (JSON)", to_json(indent=2), file_name="metrics.json")
+        st.download_button("Metrics (Prometheus)", to_prometheus('resume_app'), file_name="metrics.prom")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,95 @@
+import argparse
+import statistics
+
+from telemetry import run_probe
+
+# Each loader runs in a fresh interpreter. After loading, the process forks workers that each classify
+# a resume, and every worker reports its own memory from /proc/self/smaps_rollup: private pages are
+# what the worker duplicated, PSS is its fair share of the pages it still shares with the parent.
+WORKERS = """
+mark('load_s')
+texts = [{text!r}]
+model.predict_proba(tfidf.transform(texts))
+mark('first_prediction_s')
+
+import json, os
+
+def smaps():
+    out = {{}}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                    out[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return out
+
+workers = []
+for _ in range({workers}):
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        for _ in range(20):
+            model.predict_proba(tfidf.transform(texts))
+        os.write(write, json.dumps(smaps()).encode())
+        os._exit(0)
+    os.close(write)
+    workers.append((pid, read))
+reports = []
+for pid, read in workers:
+    with os.fdopen(read) as f:
+        reports.append(json.loads(f.read() or '{{}}'))
+    os.waitpid(pid, 0)
+
+result['worker_private_mb'] = [r.get('Private_Clean', 0) + r.get('Private_Dirty', 0) for r in reports]
+result['worker_pss_mb'] = [r.get('Pss', 0) for r in reports]
+"""
+
+LOADERS = {
+    'pickle (joblib + sklearn)': (
+        "import joblib\n"
+        "tfidf = joblib.load('tfidf_vectorizer.pkl')\n"
+        "model = joblib.load('resume_classifier.pkl')"),
+    'compact (mmap .npy)': (
+        "from compact_model import CompactClassifier, CompactVectorizer\n"
+        "from storage import current_version\n"
+        "path = current_version({path!r})\n"
+        "tfidf = CompactVectorizer.load(path)\n"
+        "model = CompactClassifier.load(path)"),
+}
+
+SAMPLE_TEXT = "data analyst sql python tableau dashboard statistic excel power bi a/b testing"
+
+
+def probe(load, path, workers):
+    body = load.format(path=path) + WORKERS.format(text=SAMPLE_TEXT, workers=workers)
+    return run_probe(body, modules=['sklearn'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare load time and per-worker memory of the pickles vs the compact export.")
+    parser.add_argument('--model-dir', default='resume_model')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=4, help="Forked workers per run for the memory figures")
+    args = parser.parse_args(argv)
+
+    print(f"{'loader':<28}{'load ms':>10}{'first pred ms':>15}{'max RSS MB':>12}"
+          f"{'worker private MB':>19}{'worker PSS MB':>15}{'sklearn':>9}")
+    for name, load in LOADERS.items():
+        runs = [probe(load, args.model_dir, args.workers) for _ in range(args.repeat)]
+        private = [m for r in runs for m in r['worker_private_mb']]
+        pss = [m for r in runs for m in r['worker_pss_mb']]
+        print(f"{name:<28}"
+              f"{statistics.median(r['load_s'] for r in runs) * 1000:>10.1f}"
+              f"{statistics.median(r['first_prediction_s'] for r in runs) * 1000:>15.1f}"
+              f"{statistics.median(r['max_rss_mb'] for r in runs):>12.1f}"
+              f"{statistics.median(private) if private else float('nan'):>19.1f}"
+              f"{statistics.median(pss) if pss else float('nan'):>15.1f}"
+              f"{str(runs[0]['modules_loaded']['sklearn']):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+from preprocess import Preprocessor, load_nlp
+
+
+# preprocess_text as app.py had it before Preprocessor: full pipeline, one document per call
+def legacy_preprocess(nlp, text):
+    text = text.lower()
+    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'[0-9]+', '', text)
+    doc = nlp(text)
+    tokens = [token.lemma_ for token in doc if not token.is_punct]
+    return ' '.join(tokens)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare resume preprocessing throughput.")
+    parser.add_argument('--data', default='Dataset/resume.csv')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--n-process', type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    args = parser.parse_args(argv)
+
+    texts = pd.read_csv(args.data)['resume_text'].tolist()[:args.limit]
+    full_nlp = load_nlp(slim=False)
+    slim = Preprocessor(load_nlp(), batch_size=args.batch_size)
+
+    baseline, baseline_s = timed(lambda: [legacy_preprocess(full_nlp, t) for t in texts])
+    runs = {
+        'legacy preprocess_text (full pipeline)': baseline_s,
+    }
+    checks = {}
+    checks['slim, one at a time'], runs['slim, one at a time'] = timed(lambda: [slim(t) for t in texts])
+    checks['slim nlp.pipe, 1 process'], runs['slim nlp.pipe, 1 process'] = timed(lambda: slim.pipe(texts, n_process=1))
+    if args.n_process > 1:
+        name = f'slim nlp.pipe, {args.n_process} processes'
+        checks[name], runs[name] = timed(lambda: slim.pipe(texts, n_process=args.n_process))
+
+    print(f"{len(texts):,} resumes from {args.data}\n")
+    print(f"{'mode':<42}{'docs/sec':>10}{'speedup':>9}{'identical':>11}")
+    for name, seconds in runs.items():
+        identical = checks[name] == baseline if name in checks else True
+        print(f"{name:<42}{len(texts) / seconds:>10.1f}{baseline_s / seconds:>8.1f}x{str(identical):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+
+from telemetry import run_probe
+
+# Soak run: render both result charts for N synthetic analyses and track per-request latency and RSS.
+# Each renderer runs in a fresh interpreter so RSS growth is not shared between them.
+SOAK = """
+import io, time
+import numpy as np
+
+rng = np.random.default_rng(seed)
+classes = np.array([f'Role {i}' for i in range(n_classes)])
+
+if renderer == 'svg':
+    from charts import bar_chart_svg, gauge_svg, top_roles
+    def render(proba, score):
+        return len(bar_chart_svg(top_roles(classes, proba))) + len(gauge_svg(score))
+else:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    def to_png(fig):
+        # What st.pyplot does with a figure
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getbuffer().nbytes
+
+    def render(proba, score):
+        # The app's previous code path; 'matplotlib' leaves figures open as it did
+        top = pd.DataFrame({'Category': classes, 'Probability': proba}).sort_values('Probability', ascending=False).head(5)
+        fig, ax = plt.subplots(figsize=(6, 4.5))
+        ax.bar(top['Category'], top['Probability'], color='royalblue')
+        ax.set_ylabel('Probability', fontsize=12)
+        ax.set_title('Top 5 Roles', fontsize=14)
+        ax.set_xticks(range(len(top)))
+        ax.set_xticklabels(top['Category'], rotation=45, ha='right')
+        plt.tight_layout()
+        size = to_png(fig)
+        if renderer == 'matplotlib-closed':
+            plt.close(fig)
+
+        fig, ax = plt.subplots(figsize=(3, 2.5))
+        ax.pie([score, 100 - score], startangle=90, colors=['#4CAF50' if score >= 75 else '#F44336', '#e0e0e0'],
+               radius=1.2, wedgeprops=dict(width=0.3))
+        ax.text(0, 0, f"{score}%", ha='center', va='center', fontsize=14, weight='bold')
+        ax.set_aspect('equal')
+        plt.axis('off')
+        plt.tight_layout()
+        size += to_png(fig)
+        if renderer == 'matplotlib-closed':
+            plt.close(fig)
+        return size
+
+start_rss = current_rss_mb()
+latencies, samples = [], []
+for i in range(n):
+    proba = rng.dirichlet(np.ones(n_classes))
+    score = float(np.round(rng.uniform(0, 100), 2))
+    t0 = time.perf_counter()
+    render(proba, score)
+    latencies.append(time.perf_counter() - t0)
+    if (i + 1) % max(1, n // 10) == 0:
+        samples.append(round(current_rss_mb(), 1))
+
+lat = np.array(latencies) * 1000
+result.update(p50_ms=float(np.percentile(lat, 50)), p99_ms=float(np.percentile(lat, 99)), first_ms=float(lat[0]),
+              start_rss_mb=start_rss, end_rss_mb=current_rss_mb(), rss_samples=samples)
+"""
+
+RENDERERS = ['matplotlib', 'matplotlib-closed', 'svg']
+
+
+def soak(renderer, n, n_classes, seed):
+    params = f"renderer, n, n_classes, seed = {renderer!r}, {n}, {n_classes}, {seed}\n"
+    return run_probe(params + SOAK)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test chart rendering: latency and RSS growth over many analyses.")
+    parser.add_argument('--analyses', type=int, default=1000)
+    parser.add_argument('--classes', type=int, default=25, help="Number of predicted roles")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--renderers', nargs='*', default=RENDERERS, choices=RENDERERS)
+    args = parser.parse_args(argv)
+
+    print(f"{'renderer':<20}{'first ms':>10}{'p50 ms':>9}{'p99 ms':>9}{'start MB':>10}{'end MB':>9}{'growth MB':>11}")
+    for renderer in args.renderers:
+        r = soak(renderer, args.analyses, args.classes, args.seed)
+        print(f"{renderer:<20}{r['first_ms']:>10.2f}{r['p50_ms']:>9.3f}{r['p99_ms']:>9.3f}"
+              f"{r['start_rss_mb']:>10.1f}{r['end_rss_mb']:>9.1f}{r['end_rss_mb'] - r['start_rss_mb']:>11.1f}")
+        print(f"{'':<20}RSS every {max(1, args.analyses // 10)} analyses: {r['rss_samples']}")
+
+
+if __name__ == "__main__":
+    main()
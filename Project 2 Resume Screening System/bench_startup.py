@@ -0,0 +1,86 @@
+import argparse
+import subprocess
+import sys
+
+from telemetry import run_probe
+
+MODULES = [
+    'streamlit', 'pandas', 'numpy', 'joblib', 'scipy.sparse', 'sklearn.metrics.pairwise',
+    'spacy', 'en_core_web_sm', 'PyPDF2', 'docx', 'matplotlib.pyplot',
+]
+
+SAMPLE_RESUME = "Experienced Data Analyst skilled in SQL, Python, Tableau and statistics."
+
+# What app.py did before any analysis could run: every import plus both pickles and the full spaCy pipeline
+EAGER = """
+import joblib, spacy, en_core_web_sm, pandas, numpy, matplotlib.pyplot
+from sklearn.metrics.pairwise import cosine_similarity
+from PyPDF2 import PdfReader
+from docx import Document
+mark('ready_s')
+model = joblib.load('resume_classifier.pkl')
+tfidf = joblib.load('tfidf_vectorizer.pkl')
+nlp = spacy.load('en_core_web_sm')
+preprocess = lambda t: ' '.join(tok.lemma_ for tok in nlp(t.lower()) if not tok.is_punct)
+"""
+
+# What app.py does now: light imports, then the background loader supplies models on first use
+LAZY = """
+from preprocess import Preprocessor, load_nlp
+from warmup import BackgroundLoader
+mark('ready_s')
+
+def load_pickle(path):
+    import joblib
+    return joblib.load(path)
+
+models = BackgroundLoader({
+    'nlp': load_nlp,
+    'model': lambda: load_pickle('resume_classifier.pkl'),
+    'tfidf': lambda: load_pickle('tfidf_vectorizer.pkl'),
+})
+model, tfidf = models.get('model'), models.get('tfidf')
+preprocess = Preprocessor(models.get('nlp'))
+"""
+
+PREDICT = """
+model.predict_proba(tfidf.transform([preprocess({resume!r})]))
+mark('first_prediction_s')
+"""
+
+
+def import_time_us(module):
+    # -X importtime reports cumulative microseconds per module on stderr; the last matching line is the top level
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    if result.returncode:
+        return None
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return None
+
+
+def probe(setup):
+    return run_probe(setup + PREDICT.format(resume=SAMPLE_RESUME))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-module import time and time-to-first-prediction.")
+    parser.add_argument('--modules', nargs='*', default=MODULES)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<28}{'import ms':>10}")
+    for module in args.modules:
+        us = import_time_us(module)
+        print(f"{module:<28}{'n/a' if us is None else f'{us / 1000:.1f}':>10}")
+
+    print(f"\n{'startup':<28}{'page ready ms':>14}{'first prediction ms':>21}{'max RSS MB':>12}")
+    for name, setup in [('eager (old app.py)', EAGER), ('lazy + background warm-up', LAZY)]:
+        r = probe(setup)
+        print(f"{name:<28}{r['ready_s'] * 1000:>14.1f}{r['first_prediction_s'] * 1000:>21.1f}{r['max_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
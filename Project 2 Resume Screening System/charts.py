@@ -0,0 +1,96 @@
+import math
+from functools import lru_cache
+from html import escape
+
+import numpy as np
+
+GAUGE_PASS = '#4CAF50'
+GAUGE_FAIL = '#F44336'
+GAUGE_TRACK = '#e0e0e0'
+BAR_COLOR = 'royalblue'
+
+# The app's charts as SVG strings: no figure objects are created, so there is nothing to free,
+# and identical inputs are served from an LRU of rendered markup.
+
+
+def top_roles(classes, probabilities, k=5):
+    # Highest-probability classes first; a stable sort keeps ties in class order like sort_values did
+    order = np.argsort(-np.asarray(probabilities), kind='stable')[:k]
+    return tuple((str(classes[i]), float(probabilities[i])) for i in order)
+
+
+def _arc_point(cx, cy, r, fraction):
+    # Counter-clockwise from 12 o'clock, the way ax.pie(startangle=90) lays out its first wedge
+    angle = math.pi / 2 + 2 * math.pi * fraction
+    return cx + r * math.cos(angle), cy - r * math.sin(angle)
+
+
+@lru_cache(maxsize=1024)
+def _gauge_svg(score, label, size):
+    cx = cy = size / 2
+    width = size * 0.3 / 2.6
+    r = size * 1.2 / 2.6 - width / 2
+    fraction = min(max(score, 0.0), 100.0) / 100
+    color = GAUGE_PASS if score >= 75 else GAUGE_FAIL
+
+    parts = [f'<circle cx="{cx:.2f}" cy="{cy:.2f}" r="{r:.2f}" fill="none" '
+             f'stroke="{GAUGE_TRACK}" stroke-width="{width:.2f}"/>']
+    if fraction >= 1:
+        parts.append(f'<circle cx="{cx:.2f}" cy="{cy:.2f}" r="{r:.2f}" fill="none" '
+                     f'stroke="{color}" stroke-width="{width:.2f}"/>')
+    elif fraction > 0:
+        x0, y0 = _arc_point(cx, cy, r, 0)
+        x1, y1 = _arc_point(cx, cy, r, fraction)
+        parts.append(f'<path d="M {x0:.2f} {y0:.2f} A {r:.2f} {r:.2f} 0 {int(fraction > 0.5)} 0 {x1:.2f} {y1:.2f}" '
+                     f'fill="none" stroke="{color}" stroke-width="{width:.2f}"/>')
+    parts.append(f'<text x="{cx:.2f}" y="{cy:.2f}" text-anchor="middle" dominant-baseline="central" '
+                 f'font-family="sans-serif" font-size="{size * 0.09:.1f}" font-weight="bold">{escape(label)}</text>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+            f'viewBox="0 0 {size} {size}">{"".join(parts)}</svg>')
+
+
+def gauge_svg(score, size=250):
+    # The label keeps the score's own formatting (e.g. numpy floats), as the matplotlib gauge did
+    return _gauge_svg(float(score), f"{score}%", size)
+
+
+@lru_cache(maxsize=1024)
+def _bar_chart_svg(roles, title, width, height):
+    left, right, top, bottom = 60, 20, 40, 130
+    plot_w, plot_h = width - left - right, height - top - bottom
+    y_max = max((p for _, p in roles), default=0) or 1
+    # Round the axis up to a 0.1 step so tick labels stay short
+    y_max = math.ceil(y_max * 10) / 10
+    slot = plot_w / max(len(roles), 1)
+    bar_w = slot * 0.8
+
+    parts = [f'<text x="{width / 2:.1f}" y="{top / 2 + 6:.1f}" text-anchor="middle" '
+             f'font-size="16">{escape(title)}</text>',
+             f'<text transform="translate(16 {top + plot_h / 2:.1f}) rotate(-90)" '
+             f'text-anchor="middle" font-size="13">Probability</text>']
+    for i in range(6):
+        value = y_max * i / 5
+        y = top + plot_h - plot_h * value / y_max
+        parts.append(f'<line x1="{left - 4}" y1="{y:.1f}" x2="{left}" y2="{y:.1f}" stroke="black"/>')
+        parts.append(f'<text x="{left - 7}" y="{y + 4:.1f}" text-anchor="end" font-size="11">{value:.2f}</text>')
+    for i, (category, probability) in enumerate(roles):
+        x = left + slot * i + (slot - bar_w) / 2
+        h = plot_h * probability / y_max
+        label_x, label_y = x + bar_w / 2, top + plot_h + 12
+        parts.append(f'<rect x="{x:.1f}" y="{top + plot_h - h:.1f}" width="{bar_w:.1f}" height="{h:.1f}" '
+                     f'fill="{BAR_COLOR}"><title>{escape(category)}: {probability:.3f}</title></rect>')
+        parts.append(f'<text transform="translate({label_x:.1f} {label_y:.1f}) rotate(-45)" '
+                     f'text-anchor="end" font-size="11">{escape(category)}</text>')
+    parts.append(f'<path d="M {left} {top} V {top + plot_h} H {left + plot_w}" fill="none" stroke="black"/>')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="0 0 {width} {height}" font-family="sans-serif">{"".join(parts)}</svg>')
+
+
+def bar_chart_svg(roles, title='Top 5 Roles', width=600, height=450):
+    # Probabilities are rounded to the rendered precision so near-identical requests share a cache entry
+    roles = tuple((category, round(probability, 4)) for category, probability in roles)
+    return _bar_chart_svg(roles, title, width, height)
+
+
+def cache_info():
+    return {'gauge': _gauge_svg.cache_info(), 'bar_chart': _bar_chart_svg.cache_info()}
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+from storage import current_version, new_version
+from telemetry import timed
+
+DEFAULT_MODEL_DIR = 'resume_model'
+METADATA_FILE = 'metadata.json'
+FORMAT_VERSION = 2
+
+# A fitted TfidfVectorizer and linear classifier as plain .npy arrays plus a JSON sidecar:
+#   vocab.npy     sorted term strings, looked up with np.searchsorted
+#   columns.npy   the TF-IDF column of each sorted term
+#   idf.npy       idf weights per column
+#   classes.npy   class labels
+#   coef.npy      (n_features x n_classes) weights; intercept.npy per-class bias
+# Each export is a new version directory under the model directory, published by switching its
+# CURRENT pointer; loaders resolve the pointer once so the two halves always come from one export.
+# Every array is opened with mmap_mode='r', so forked workers share the pages instead of each
+# holding an unpickled dict and estimator. Arrays keep sklearn's float64 so outputs match exactly.
+
+
+def _strip_accents_ascii(s):
+    return unicodedata.normalize('NFKD', s).encode('ASCII', 'ignore').decode('ASCII')
+
+
+def _strip_accents_unicode(s):
+    try:
+        s.encode('ASCII', errors='strict')
+        return s
+    except UnicodeEncodeError:
+        return ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c))
+
+
+STRIP_ACCENTS = {None: None, 'ascii': _strip_accents_ascii, 'unicode': _strip_accents_unicode}
+
+
+def vectorizer_config(tfidf):
+    if tfidf.analyzer != 'word' or tfidf.tokenizer is not None or tfidf.preprocessor is not None:
+        raise ValueError("Only word analyzers with the default tokenizer and preprocessor can be exported")
+    if tfidf.strip_accents not in STRIP_ACCENTS:
+        raise ValueError(f"Unsupported strip_accents: {tfidf.strip_accents!r}")
+    if tfidf.norm not in ('l1', 'l2', None):
+        raise ValueError(f"Unsupported norm: {tfidf.norm!r}")
+    if np.dtype(tfidf.dtype) != np.float64:
+        raise ValueError(f"Only float64 vectorizers are reproduced exactly, got dtype={np.dtype(tfidf.dtype)}")
+    stop_words = tfidf.get_stop_words()
+    return {
+        'lowercase': tfidf.lowercase,
+        'strip_accents': tfidf.strip_accents,
+        'token_pattern': tfidf.token_pattern,
+        'stop_words': sorted(stop_words) if stop_words is not None else None,
+        'ngram_range': list(tfidf.ngram_range),
+        'binary': tfidf.binary,
+        'sublinear_tf': tfidf.sublinear_tf,
+        'use_idf': tfidf.use_idf,
+        'norm': tfidf.norm,
+        'dtype': np.dtype(tfidf.dtype).str,
+    }
+
+
+def classifier_arrays(model):
+    # (kind, arrays) for the estimators the app can load; anything else is refused rather than approximated
+    name = type(model).__name__
+    if name == 'LogisticRegression':
+        # Same rule as LogisticRegression.predict_proba for choosing one-vs-rest over softmax
+        multi_class = getattr(model, 'multi_class', 'auto')
+        ovr = multi_class in ('ovr', 'warn') or (
+            multi_class in ('auto', 'deprecated') and (model.classes_.size <= 2 or model.solver == 'liblinear'))
+        return ('logistic_ovr' if ovr else 'logistic_softmax'), {
+            'coef': model.coef_.T, 'intercept': model.intercept_}
+    if name == 'MultinomialNB':
+        return 'multinomial_nb', {'coef': model.feature_log_prob_.T, 'intercept': model.class_log_prior_}
+    raise ValueError(f"Cannot export {name}; supported: LogisticRegression, MultinomialNB")
+
+
+@timed('compact_model.write')
+def write_compact(tfidf, model, out_dir=DEFAULT_MODEL_DIR):
+    config = vectorizer_config(tfidf)
+    kind, arrays = classifier_arrays(model)
+    terms = np.array(list(tfidf.vocabulary_), dtype=str)
+    order = np.argsort(terms, kind='stable')
+    classes = np.asarray(model.classes_)
+    arrays.update(
+        vocab=terms[order],
+        columns=np.fromiter(tfidf.vocabulary_.values(), dtype=np.int32, count=len(terms))[order],
+        # String labels are stored as a fixed-width array; object arrays cannot be memory-mapped
+        classes=classes.astype(str) if classes.dtype == object else classes,
+    )
+    if config['use_idf']:
+        arrays['idf'] = np.asarray(tfidf.idf_)
+
+    with new_version(out_dir) as tmp:
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(arr))
+        with open(os.path.join(tmp, METADATA_FILE), 'w') as f:
+            json.dump({'format_version': FORMAT_VERSION, 'classifier': kind, 'n_features': len(terms),
+                       'vectorizer': config}, f, indent=2)
+    return current_version(out_dir)
+
+
+def read_metadata(path):
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    if metadata.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {metadata.get('format_version')}, expected {FORMAT_VERSION}")
+    if metadata['vectorizer']['dtype'] != np.dtype(np.float64).str:
+        raise ValueError(f"{path} was exported from a {metadata['vectorizer']['dtype']} vectorizer; only float64 is supported")
+    return metadata
+
+
+def _load(path, name):
+    return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+
+class CompactVectorizer:
+    # Reproduces TfidfVectorizer.transform: same analyzer, same counts, same float64 arithmetic and
+    # the same sequential row-norm accumulation as sklearn's normalize()
+    def __init__(self, config, vocab, columns, idf=None):
+        self.config = config
+        self.vocab = vocab
+        self.columns = columns
+        self.idf_ = idf
+        self.n_features = len(vocab)
+        self._token_re = re.compile(config['token_pattern'])
+        self._strip = STRIP_ACCENTS[config['strip_accents']]
+        self._stop_words = frozenset(config['stop_words']) if config['stop_words'] is not None else None
+        self._vocabulary = None
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_DIR):
+        path = current_version(path)
+        metadata = read_metadata(path)
+        idf = _load(path, 'idf') if metadata['vectorizer']['use_idf'] else None
+        return cls(metadata['vectorizer'], _load(path, 'vocab'), _load(path, 'columns'), idf)
+
+    @property
+    def vocabulary_(self):
+        # Built on first use only, for callers such as KeywordVocabulary that need the dict
+        if self._vocabulary is None:
+            self._vocabulary = dict(zip(self.vocab.tolist(), self.columns.tolist()))
+        return self._vocabulary
+
+    def analyze(self, doc):
+        if self.config['lowercase']:
+            doc = doc.lower()
+        if self._strip is not None:
+            doc = self._strip(doc)
+        tokens = self._token_re.findall(doc)
+        if self._stop_words is not None:
+            tokens = [w for w in tokens if w not in self._stop_words]
+        min_n, max_n = self.config['ngram_range']
+        if max_n == 1:
+            return tokens
+        original = tokens
+        tokens = list(original) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n + 1, len(original) + 1)):
+            tokens.extend(' '.join(original[i:i + n]) for i in range(len(original) - n + 1))
+        return tokens
+
+    def transform(self, raw_documents):
+        import scipy.sparse as sp
+
+        if isinstance(raw_documents, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+        terms, lengths = [], []
+        for doc in raw_documents:
+            tokens = self.analyze(doc)
+            terms.extend(tokens)
+            lengths.append(len(tokens))
+        n_docs = len(lengths)
+
+        # Vocabulary lookup for the whole batch with one binary search
+        terms = np.array(terms, dtype=str)
+        pos = np.minimum(np.searchsorted(self.vocab, terms), max(self.n_features - 1, 0))
+        known = (self.vocab[pos] == terms) if len(terms) else np.zeros(0, dtype=bool)
+        rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)[known]
+        cols = self.columns[pos[known]].astype(np.int64)
+
+        # Unique (row, col) keys come back sorted, which is the canonical CSR order sklearn produces
+        keys, counts = np.unique(rows * self.n_features + cols, return_counts=True)
+        data = np.ones(len(keys)) if self.config['binary'] else counts.astype(np.float64)
+        indices = (keys % max(self.n_features, 1)).astype(np.int32)
+        indptr = np.zeros(n_docs + 1, dtype=np.int32)
+        np.cumsum(np.bincount(keys // max(self.n_features, 1), minlength=n_docs), out=indptr[1:])
+
+        if self.config['sublinear_tf']:
+            np.log(data, data)
+            data += 1.0
+        if self.idf_ is not None:
+            data *= self.idf_[indices]
+        norm = self.config['norm']
+        if norm is not None:
+            terms_sq = data * data if norm == 'l2' else np.abs(data)
+            for start, end in zip(indptr[:-1], indptr[1:]):
+                if start == end:
+                    continue
+                # cumsum adds left to right, the order sklearn's Cython row-norm loop uses
+                total = np.cumsum(terms_sq[start:end])[-1]
+                if total == 0.0:
+                    continue
+                data[start:end] /= np.sqrt(total) if norm == 'l2' else total
+        return sp.csr_matrix((data, indices, indptr), shape=(n_docs, self.n_features))
+
+
+class CompactClassifier:
+    # predict / predict_proba for exported LogisticRegression and MultinomialNB models
+    def __init__(self, kind, coef, intercept, classes):
+        self.kind = kind
+        self.coef = coef
+        self.intercept = intercept
+        self.classes_ = classes
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL_DIR):
+        path = current_version(path)
+        metadata = read_metadata(path)
+        return cls(metadata['classifier'], _load(path, 'coef'), _load(path, 'intercept'), _load(path, 'classes'))
+
+    def _scores(self, X):
+        # Sparse rows times the dense (features x classes) matrix, as safe_sparse_dot(X, coef_.T) does
+        scores = X @ self.coef + self.intercept
+        if self.kind != 'multinomial_nb' and scores.shape[1] == 1:
+            return scores.ravel()
+        return scores
+
+    def decision_function(self, X):
+        return self._scores(X)
+
+    def predict_proba(self, X):
+        from scipy.special import expit, logsumexp
+
+        scores = self._scores(X)
+        if self.kind == 'multinomial_nb':
+            return np.exp(scores - np.atleast_2d(logsumexp(scores, axis=1)).T)
+        if self.kind == 'logistic_ovr':
+            expit(scores, out=scores)
+            if scores.ndim == 1:
+                return np.vstack([1 - scores, scores]).T
+            scores /= scores.sum(axis=1).reshape((scores.shape[0], -1))
+            return scores
+        scores = np.c_[-scores, scores] if scores.ndim == 1 else scores
+        scores -= np.max(scores, axis=1).reshape((-1, 1))
+        np.exp(scores, scores)
+        scores /= np.sum(scores, axis=1).reshape((-1, 1))
+        return scores
+
+    def predict(self, X):
+        scores = self._scores(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def verify(tfidf, model, compact_dir, texts):
+    # Compares the compact path against the pickles bit for bit; returns a dict of mismatches (empty if exact)
+    compact_dir = current_version(compact_dir)
+    vectorizer, classifier = CompactVectorizer.load(compact_dir), CompactClassifier.load(compact_dir)
+    expected, actual = tfidf.transform(texts), vectorizer.transform(texts)
+    expected.sort_indices()
+    problems = {}
+    for name in ('indptr', 'indices', 'data'):
+        if not np.array_equal(getattr(expected, name), getattr(actual, name)):
+            problems[f'transform.{name}'] = True
+    if not np.array_equal(model.predict_proba(expected), classifier.predict_proba(actual)):
+        problems['predict_proba'] = float(np.abs(model.predict_proba(expected) - classifier.predict_proba(actual)).max())
+    if not np.array_equal(model.predict(expected), classifier.predict(actual)):
+        problems['predict'] = True
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the resume vectorizer and classifier as memory-mappable arrays.")
+    parser.add_argument('--tfidf', default='tfidf_vectorizer.pkl')
+    parser.add_argument('--model', default='resume_classifier.pkl')
+    parser.add_argument('--out', default=DEFAULT_MODEL_DIR)
+    parser.add_argument('--verify', metavar='CSV', help="Check outputs match the pickles on preprocessed resumes from this CSV")
+    parser.add_argument('--limit', type=int, default=500, help="Resumes to use for --verify")
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    tfidf, model = joblib.load(args.tfidf), joblib.load(args.model)
+    version_dir = write_compact(tfidf, model, args.out)
+    size = sum(os.path.getsize(os.path.join(version_dir, f)) for f in os.listdir(version_dir))
+    print(f"Wrote {version_dir}/ ({size / 1024:.1f} KB, {len(tfidf.vocabulary_):,} terms, {len(model.classes_)} classes)")
+
+    if args.verify:
+        import pandas as pd
+        from preprocess import Preprocessor
+
+        texts = Preprocessor().pipe(pd.read_csv(args.verify, nrows=args.limit)['resume_text'].fillna(''))
+        problems = verify(tfidf, model, version_dir, texts)
+        print("Outputs match exactly" if not problems else f"MISMATCH: {problems}")
+        if problems:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
-import pandas as pd
-import numpy as np
-import random
-from faker import Faker
+import argparse
 import os
-from datetime import datetime, timedelta
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
 
-fake = Faker()
+import numpy as np
+import pandas as pd
 
-os.makedirs('resume_dataset_final', exist_ok=True)
+from storage import TableWriter
+from telemetry import timer
 
 # Categories
 skills = {
@@ -23,10 +27,10 @@ skills = {
     'Product Manager': ['Agile', 'Scrum', 'Product Roadmap', 'Market Research', 'User Stories', 'JIRA', 'Competitive Analysis', 'KPIs', 'Go-to-Market', 'Customer Development']
 }
 
-# Common skills 
+# Common skills
 common_skills = ['Microsoft Office', 'Communication', 'Leadership', 'Project Management', 'Teamwork', 'Problem Solving', 'Time Management', 'Presentation Skills']
 
-# Education 
+# Education
 degrees = ['Bachelors', 'Masters', 'PhD', 'Diploma']
 
 similar_categories = {
@@ -34,7 +38,7 @@ similar_categories = {
     'Data Scientist': ['Data Analyst', 'Software Engineer'],
     'Marketing Manager': ['Product Manager', 'HR Specialist'],
     'Financial Analyst': ['Data Analyst', 'Software Engineer'],
-    'HR Specialist': ['Marketing Manager', 'Data Analyst'], 
+    'HR Specialist': ['Marketing Manager', 'Data Analyst'],
     'Data Analyst': ['Data Scientist', 'Financial Analyst'],
     'Cybersecurity Analyst': ['DevOps Engineer', 'Software Engineer'],
     'UX Designer': ['Product Manager', 'Marketing Manager'],
@@ -42,194 +46,291 @@ similar_categories = {
     'Product Manager': ['Marketing Manager', 'UX Designer']
 }
 
+titles = {
+    'Software Engineer': ['Junior Software Engineer', 'Software Engineer', 'Senior Software Engineer', 'Lead Developer'],
+    'Data Scientist': ['Data Science Intern', 'Junior Data Scientist', 'Data Scientist', 'Senior Data Scientist'],
+    'Marketing Manager': ['Marketing Coordinator', 'Marketing Specialist', 'Marketing Manager', 'Senior Marketing Manager'],
+    'Financial Analyst': ['Financial Analyst I', 'Financial Analyst II', 'Senior Financial Analyst', 'Finance Manager'],
+    'HR Specialist': ['HR Assistant', 'HR Generalist', 'HR Specialist', 'HR Manager'],
+    'Data Analyst': ['Data Analyst', 'Business Analyst', 'Senior Data Analyst', 'Analytics Manager'],
+    'Cybersecurity Analyst': ['Security Analyst', 'Cybersecurity Specialist', 'Security Engineer', 'CISO'],
+    'UX Designer': ['UX Designer', 'UI/UX Designer', 'Senior UX Designer', 'UX Lead'],
+    'DevOps Engineer': ['DevOps Engineer', 'Site Reliability Engineer', 'Cloud Engineer', 'DevOps Manager'],
+    'Product Manager': ['Associate Product Manager', 'Product Manager', 'Senior Product Manager', 'Director of Product']
+}
+
+majors = {
+    'Software Engineer': 'Computer Science',
+    'Data Scientist': 'Data Science',
+    'Data Analyst': 'Statistics',
+    'Financial Analyst': 'Finance',
+    'Marketing Manager': 'Marketing',
+    'HR Specialist': 'Human Resources',
+    'Cybersecurity Analyst': 'Cybersecurity',
+    'UX Designer': 'Human-Computer Interaction',
+    'DevOps Engineer': 'Computer Engineering',
+    'Product Manager': 'Business Administration'
+}
+
+certs = {
+    'Software Engineer': ['AWS Certified Developer', 'Google Cloud Professional'],
+    'Data Scientist': ['TensorFlow Developer', 'Data Science Council'],
+    'Marketing Manager': ['Google Analytics IQ', 'HubSpot Content Marketing'],
+    'Financial Analyst': ['CFA Level I', 'FRM Certification'],
+    'HR Specialist': ['PHR', 'SHRM-CP'],
+    'Data Analyst': ['Google Data Analytics', 'Microsoft Data Analyst'],
+    'Cybersecurity Analyst': ['CISSP', 'CEH'],
+    'UX Designer': ['Google UX Design', 'NN/g UX Certification'],
+    'DevOps Engineer': ['CKAD', 'Docker Certified'],
+    'Product Manager': ['Pragmatic Institute', 'SAFe Product Owner']
+}
+
+tools = ['JIRA', 'Confluence', 'Slack', 'Trello', 'Asana', 'GitHub', 'GitLab', 'Bitbucket', 'Jenkins', 'CircleCI']
+
+CATEGORIES = list(skills)
+# Column j of SIMILAR holds each category's j-th similar category as an index into CATEGORIES
+SIMILAR = np.array([[CATEGORIES.index(c) for c in similar_categories[cat]] for cat in CATEGORIES])
+
+DEFAULT_ROWS = 2000
+# fake.year() draws up to the wall clock; graduation years are drawn from here to as_of instead
+EPOCH = date(1970, 1, 1)
+DEFAULT_SHARD_SIZE = 10_000
+AMBIGUOUS_RATE = 0.07
+RANDOM_LABEL_RATE = 0.03
+
+
 def generate_job_title(category, experience_level):
-    titles = {
-        'Software Engineer': ['Junior Software Engineer', 'Software Engineer', 'Senior Software Engineer', 'Lead Developer'],
-        'Data Scientist': ['Data Science Intern', 'Junior Data Scientist', 'Data Scientist', 'Senior Data Scientist'],
-        'Marketing Manager': ['Marketing Coordinator', 'Marketing Specialist', 'Marketing Manager', 'Senior Marketing Manager'],
-        'Financial Analyst': ['Financial Analyst I', 'Financial Analyst II', 'Senior Financial Analyst', 'Finance Manager'],
-        'HR Specialist': ['HR Assistant', 'HR Generalist', 'HR Specialist', 'HR Manager'],
-        'Data Analyst': ['Data Analyst', 'Business Analyst', 'Senior Data Analyst', 'Analytics Manager'],
-        'Cybersecurity Analyst': ['Security Analyst', 'Cybersecurity Specialist', 'Security Engineer', 'CISO'],
-        'UX Designer': ['UX Designer', 'UI/UX Designer', 'Senior UX Designer', 'UX Lead'],
-        'DevOps Engineer': ['DevOps Engineer', 'Site Reliability Engineer', 'Cloud Engineer', 'DevOps Manager'],
-        'Product Manager': ['Associate Product Manager', 'Product Manager', 'Senior Product Manager', 'Director of Product']
-    }
-    
     if category not in titles:
-        category = 'HR Specialist' 
-    
+        category = 'HR Specialist'
+
     experience_level = max(0, min(experience_level, len(titles[category])-1))
     return titles[category][experience_level]
 
-resumes = []
-categories = []
 
-for i in range(2000):
-    category = random.choice(list(skills.keys()))
-    categories.append(category)
-    
+def generate_resume(category, rnd, fake, as_of):
+    # One resume as data.py always wrote it; all randomness comes from rnd and the seeded Faker
     resume_content = []
-    
+
     resume_content.append(f"Name: {fake.name()}")
     resume_content.append(f"Email: {fake.email()}")
     resume_content.append(f"Phone: {fake.phone_number()}")
     resume_content.append(f"LinkedIn: {fake.url()}")
     resume_content.append("\n")
-    
-    if random.random() < 0.5:
+
+    if rnd.random() < 0.5:
         resume_content.append("SUMMARY")
-        summary = f"Experienced {category} with {random.randint(2,10)} years in "
-        summary += random.choice(["technology", "business solutions", "cross-functional teams", "strategic initiatives"])
-        summary += f". Skilled in {random.choice(skills[category])} and {random.choice(common_skills)}."
+        summary = f"Experienced {category} with {rnd.randint(2,10)} years in "
+        summary += rnd.choice(["technology", "business solutions", "cross-functional teams", "strategic initiatives"])
+        summary += f". Skilled in {rnd.choice(skills[category])} and {rnd.choice(common_skills)}."
         resume_content.append(summary)
         resume_content.append("\n")
-    
+
     resume_content.append("EDUCATION")
-    degree = random.choice(degrees)
+    degree = rnd.choice(degrees)
 
     if category in ['Data Scientist', 'Financial Analyst'] and degree == 'PhD':
-        degree = random.choice(['Masters', 'Bachelors'])  
-    if category in ['Software Engineer', 'DevOps Engineer'] and random.random() < 0.2:
+        degree = rnd.choice(['Masters', 'Bachelors'])
+    if category in ['Software Engineer', 'DevOps Engineer'] and rnd.random() < 0.2:
         resume_content.append(f"Bootcamp Certification in {category.replace(' Engineer', ' Development')}, {fake.company()}")
-    
-    major = fake.job().split()[0] + " Studies" if random.random() < 0.7 else {
-        'Software Engineer': 'Computer Science',
-        'Data Scientist': 'Data Science',
-        'Data Analyst': 'Statistics',
-        'Financial Analyst': 'Finance',
-        'Marketing Manager': 'Marketing',
-        'HR Specialist': 'Human Resources',
-        'Cybersecurity Analyst': 'Cybersecurity',
-        'UX Designer': 'Human-Computer Interaction',
-        'DevOps Engineer': 'Computer Engineering',
-        'Product Manager': 'Business Administration'
-    }[category]
-    
-    resume_content.append(f"{degree} in {major}, {fake.company()} University, {fake.year()}")
+
+    major = fake.job().split()[0] + " Studies" if rnd.random() < 0.7 else majors[category]
+
+    resume_content.append(f"{degree} in {major}, {fake.company()} University, {fake.date_between(start_date=EPOCH, end_date=as_of).year}")
     resume_content.append("\n")
-    
+
     resume_content.append("EXPERIENCE")
-    num_jobs = random.randint(2, 5)
+    num_jobs = rnd.randint(2, 5)
     total_years = 0
-    
+
     for j in range(num_jobs):
-        years = random.randint(1, 4)
+        years = rnd.randint(1, 4)
         total_years += years
-        
+
         exp_level = min(3, total_years // 3)
-        
+
         if j == 0:
             job_title = generate_job_title(category, exp_level)
             company_desc = f"{fake.company()} - {fake.catch_phrase()}"
         else:
-            if random.random() < 0.3:  
-                similar_cat = random.choice(similar_categories[category])
+            if rnd.random() < 0.3:
+                similar_cat = rnd.choice(similar_categories[category])
                 job_title = generate_job_title(similar_cat, max(0, exp_level-1))
             else:
                 job_title = generate_job_title(category, max(0, exp_level-1))
             company_desc = fake.company()
-        
-        dates = f"{fake.date_between(start_date='-' + str(total_years+5) + 'y', end_date='-' + str(total_years) + 'y').strftime('%b %Y')} - "
-        dates += fake.date_between(start_date='-' + str(total_years) + 'y', end_date='today').strftime('%b %Y')
-        
+
+        # Dates are relative to as_of rather than today so a seed always reproduces the same text
+        start = as_of - timedelta(days=365 * total_years)
+        dates = f"{fake.date_between(start_date=start - timedelta(days=365 * 5), end_date=start).strftime('%b %Y')} - "
+        dates += fake.date_between(start_date=start, end_date=as_of).strftime('%b %Y')
+
         resume_content.append(f"{job_title}")
         resume_content.append(f"{company_desc} | {dates}")
-        
-        num_bullets = random.randint(3, 5)
+
+        num_bullets = rnd.randint(3, 5)
         for _ in range(num_bullets):
-            action = random.choice(['Led', 'Developed', 'Implemented', 'Analyzed', 'Managed', 'Optimized', 'Designed'])
-            tech = random.choice(skills[category] + common_skills) if random.random() < 0.7 else ""
-            outcome = random.choice([
+            action = rnd.choice(['Led', 'Developed', 'Implemented', 'Analyzed', 'Managed', 'Optimized', 'Designed'])
+            tech = rnd.choice(skills[category] + common_skills) if rnd.random() < 0.7 else ""
+            outcome = rnd.choice([
                 "resulting in improved efficiency",
                 "leading to cost savings",
                 "increasing performance by",
                 "reducing time to market by",
                 "improving user satisfaction"
-            ]) if random.random() < 0.5 else ""
-            
+            ]) if rnd.random() < 0.5 else ""
+
             bullet = f"- {action} {tech} {fake.bs()} {outcome}"
-            if random.random() < 0.1:  
+            if rnd.random() < 0.1:
                 bullet = bullet.replace('ing ', 'ed ').replace('ed ', 'ing ')
             resume_content.append(bullet)
-        
+
         resume_content.append("\n")
-    
+
     # Skills
     resume_content.append("SKILLS")
-    
+
     resume_content.append("Technical:")
-    num_specific = random.randint(5, 8)  
-    for skill in random.sample(skills[category], num_specific):
+    num_specific = rnd.randint(5, 8)
+    for skill in rnd.sample(skills[category], num_specific):
         resume_content.append(f"- {skill}")
-    
-    num_related = random.randint(2, 4)
-    related_category = random.choice(similar_categories[category])
-    for skill in random.sample(skills[related_category], num_related):
+
+    num_related = rnd.randint(2, 4)
+    related_category = rnd.choice(similar_categories[category])
+    for skill in rnd.sample(skills[related_category], num_related):
         resume_content.append(f"- {skill}")
-    
-    # Tools/Platforms 
-    if random.random() < 0.5:
+
+    # Tools/Platforms
+    if rnd.random() < 0.5:
         resume_content.append("\nTools:")
-        tools = random.sample([
-            'JIRA', 'Confluence', 'Slack', 'Trello', 'Asana',
-            'GitHub', 'GitLab', 'Bitbucket', 'Jenkins', 'CircleCI'
-        ], random.randint(2, 4))
-        for tool in tools:
+        for tool in rnd.sample(tools, rnd.randint(2, 4)):
             resume_content.append(f"- {tool}")
-    
-    # Soft Skills 
+
+    # Soft Skills
     resume_content.append("\nProfessional:")
-    num_common = random.randint(3, 5)
-    for skill in random.sample(common_skills, num_common):
+    num_common = rnd.randint(3, 5)
+    for skill in rnd.sample(common_skills, num_common):
         resume_content.append(f"- {skill}")
-    
-    # Certifications 
-    if random.random() < 0.3:
+
+    # Certifications
+    if rnd.random() < 0.3:
         resume_content.append("\nCERTIFICATIONS")
-        certs = {
-            'Software Engineer': ['AWS Certified Developer', 'Google Cloud Professional'],
-            'Data Scientist': ['TensorFlow Developer', 'Data Science Council'],
-            'Marketing Manager': ['Google Analytics IQ', 'HubSpot Content Marketing'],
-            'Financial Analyst': ['CFA Level I', 'FRM Certification'],
-            'HR Specialist': ['PHR', 'SHRM-CP'],
-            'Data Analyst': ['Google Data Analytics', 'Microsoft Data Analyst'],
-            'Cybersecurity Analyst': ['CISSP', 'CEH'],
-            'UX Designer': ['Google UX Design', 'NN/g UX Certification'],
-            'DevOps Engineer': ['CKAD', 'Docker Certified'],
-            'Product Manager': ['Pragmatic Institute', 'SAFe Product Owner']
-        }
-        resume_content.append(f"- {random.choice(certs[category])}")
-    
+        resume_content.append(f"- {rnd.choice(certs[category])}")
+
     full_resume = "\n".join(resume_content)
-    
-    if random.random() < 0.3:
+
+    if rnd.random() < 0.3:
         full_resume = full_resume.replace("\n- ", "\n• ")
-    if random.random() < 0.2:
+    if rnd.random() < 0.2:
         full_resume = full_resume.replace(": ", ":\n")
-    
-    resumes.append(full_resume)
-
-df = pd.DataFrame({
-    'resume_id': range(1, 2001),
-    'resume_text': resumes,
-    'category': categories
-})
-
-ambiguous_indices = random.sample(range(2000), 140)
-for idx in ambiguous_indices:
-    current_cat = df.loc[idx, 'category']
-    df.loc[idx, 'category'] = random.choice(similar_categories[current_cat])
-
-random_indices = random.sample(range(2000), 60)
-for idx in random_indices:
-    df.loc[idx, 'category'] = random.choice(list(skills.keys()))
-
-df.to_csv('Dataset/resume.csv', index=False)
-
-print("Dataset successfully generated with:")
-print("- 2000 resumes")
-print("- 10 professional categories")
-print("- 7% ambiguous cases")
-print("- 3% random labeling errors")
-print(f"Saved to: resume_dataset_final/resume_data_10_categories.csv")
\ No newline at end of file
+
+    return full_resume
+
+
+def add_label_noise(labels, rng, ambiguous_rate=AMBIGUOUS_RATE, random_rate=RANDOM_LABEL_RATE):
+    # Relabels a fixed share of rows as a similar category, then another share uniformly at random.
+    # Rows are drawn independently for the two passes, so a few may be picked twice, as before.
+    labels = labels.copy()
+    n = len(labels)
+    ambiguous = rng.choice(n, size=round(n * ambiguous_rate), replace=False)
+    labels[ambiguous] = SIMILAR[labels[ambiguous], rng.integers(0, SIMILAR.shape[1], size=len(ambiguous))]
+    noisy = rng.choice(n, size=round(n * random_rate), replace=False)
+    labels[noisy] = rng.integers(0, len(CATEGORIES), size=len(noisy))
+    return labels
+
+
+def shard_seed(seed, shard):
+    # Depends only on the run seed and the shard number, never on worker count or scheduling order
+    return np.random.SeedSequence(seed, spawn_key=(shard,))
+
+
+def generate_shard(shard, start, size, seed, as_of, ambiguous_rate=AMBIGUOUS_RATE, random_rate=RANDOM_LABEL_RATE):
+    from faker import Faker
+
+    seq = shard_seed(seed, shard)
+    text_seed, faker_seed, label_seed = (int(s.generate_state(1)[0]) for s in seq.spawn(3))
+    rnd = random.Random(text_seed)
+    fake = Faker()
+    fake.seed_instance(faker_seed)
+    rng = np.random.default_rng(label_seed)
+
+    labels = rng.integers(0, len(CATEGORIES), size=size)
+    texts = [generate_resume(CATEGORIES[c], rnd, fake, as_of) for c in labels]
+    noisy = add_label_noise(labels, rng, ambiguous_rate, random_rate)
+    return pd.DataFrame({
+        'resume_id': np.arange(start + 1, start + size + 1),
+        'resume_text': texts,
+        'category': np.asarray(CATEGORIES, dtype=object)[noisy],
+    })
+
+
+def shard_bounds(rows, shard_size):
+    if shard_size < 1:
+        raise ValueError(f"shard_size must be at least 1, got {shard_size}")
+    for shard, start in enumerate(range(0, rows, shard_size)):
+        yield shard, start, min(shard_size, rows - start)
+
+
+def generate(rows=DEFAULT_ROWS, seed=None, shard_size=DEFAULT_SHARD_SIZE, workers=None, as_of=None,
+             ambiguous_rate=AMBIGUOUS_RATE, random_rate=RANDOM_LABEL_RATE):
+    # Yields one DataFrame per shard in order. Only a few shards per worker are in flight,
+    # so memory is bounded by the shard size rather than the corpus size.
+    as_of = as_of or date.today()
+    bounds = shard_bounds(rows, shard_size)
+    if workers == 0:
+        for shard, start, size in bounds:
+            yield generate_shard(shard, start, size, seed, as_of, ambiguous_rate, random_rate)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard, start, size in bounds:
+            pending.append(pool.submit(generate_shard, shard, start, size, seed, as_of, ambiguous_rate, random_rate))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic labelled resume corpus.")
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--seed', type=int, default=None, help="Run seed; omitted, a fresh one is drawn and printed")
+    parser.add_argument('--output', default='Dataset/resume.csv', help=".csv, or .parquet/.pq for Parquet")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (0 runs in-process)")
+    parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                        help="Reference date for employment history (YYYY-MM-DD, default today)")
+    parser.add_argument('--ambiguous-rate', type=float, default=AMBIGUOUS_RATE)
+    parser.add_argument('--random-label-rate', type=float, default=RANDOM_LABEL_RATE)
+    args = parser.parse_args(argv)
+    if args.shard_size < 1:
+        parser.error("--shard-size must be at least 1")
+
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    as_of = args.as_of or date.today()
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    written = 0
+    started = time.perf_counter()
+    with TableWriter(args.output, generate_shard(0, 0, 0, seed, as_of)) as writer:
+        for df in generate(args.rows, seed, args.shard_size, args.workers, as_of,
+                           args.ambiguous_rate, args.random_label_rate):
+            with timer('generate.write'):
+                writer.write(df)
+            written += len(df)
+            print(f"{written:,}/{args.rows:,} resumes ({written / (time.perf_counter() - started):,.0f}/sec)",
+                  file=sys.stderr)
+
+    print("Dataset successfully generated with:")
+    print(f"- {written:,} resumes")
+    print(f"- {len(CATEGORIES)} professional categories")
+    print(f"- {args.ambiguous_rate:.0%} ambiguous cases")
+    print(f"- {args.random_label_rate:.0%} random labeling errors")
+    print(f"- seed {seed}, dates as of {as_of.isoformat()}")
+    print(f"Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+from itertools import islice
+
+# Parser libraries are imported on first use so only the formats actually read get loaded
+
+def read_pdf(file, max_pages=None):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(file)
+    return "".join(page.extract_text() or "" for page in islice(reader.pages, max_pages))
+
+def read_docx(file):
+    from docx import Document
+    doc = Document(file)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+def read_txt(file):
+    return file.read().decode("utf-8")
+
+READERS = {
+    '.pdf': read_pdf,
+    '.docx': read_docx,
+    '.txt': read_txt,
+}
+
+def file_format(path):
+    return os.path.splitext(path)[1].lower()
+
+def read_path(path, max_pages=None):
+    ext = file_format(path)
+    reader = READERS[ext]
+    with open(path, 'rb') as f:
+        if ext == '.pdf':
+            return reader(f, max_pages=max_pages)
+        return reader(f)
@@ -0,0 +1,140 @@
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from documents import READERS, file_format, read_path
+from telemetry import observe
+
+IngestRecord = namedtuple('IngestRecord', 'path text error')
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def extract(path, timeout=None, max_pages=None):
+    # Returns (path, text, error, format, seconds, bytes). The timeout uses SIGALRM, which interrupts
+    # PyPDF2's pure-Python parsing; off the main thread or on Windows files run without a limit.
+    start = time.perf_counter()
+    use_alarm = (timeout and hasattr(signal, 'setitimer')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        text, error = read_path(path, max_pages=max_pages), None
+    except ExtractionTimeout:
+        text, error = None, f"timed out after {timeout}s"
+    except Exception as e:
+        text, error = None, f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    return path, text, error, file_format(path), time.perf_counter() - start, size
+
+
+class IngestStats:
+    def __init__(self):
+        self.files = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.bytes = defaultdict(int)
+        self.started = time.perf_counter()
+
+    def record(self, fmt, seconds, size, error):
+        self.files[fmt] += 1
+        self.seconds[fmt] += seconds
+        self.bytes[fmt] += size
+        if error:
+            self.errors[fmt] += 1
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        lines = [f"{'format':<8}{'files':>8}{'errors':>8}{'cpu s':>10}{'ms/file':>10}{'MB':>9}"]
+        for fmt in sorted(self.files):
+            n = self.files[fmt]
+            lines.append(f"{fmt:<8}{n:>8,}{self.errors[fmt]:>8,}{self.seconds[fmt]:>10.2f}"
+                         f"{self.seconds[fmt] / n * 1000:>10.1f}{self.bytes[fmt] / 1e6:>9.1f}")
+        total = sum(self.files.values())
+        lines.append(f"{total:,} files in {wall:.2f}s wall ({total / wall if wall else 0:,.1f} files/sec)")
+        return "\n".join(lines)
+
+
+def find_documents(path):
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if file_format(name) in READERS:
+                yield os.path.join(root, name)
+
+
+def ingest(paths, workers=None, timeout=30, max_pages=None, stats=None):
+    # Yields IngestRecords as extractions finish; at most a few tasks per worker are in flight,
+    # so arbitrarily long path iterators stream with bounded memory.
+    stats = stats if stats is not None else IngestStats()
+
+    def emit(result):
+        path, text, error, fmt, seconds, size = result
+        stats.record(fmt, seconds, size, error)
+        # Measured inside the worker, so this is extraction time without queueing
+        observe(f'ingest.extract.{fmt}', seconds)
+        return IngestRecord(path, text, error)
+
+    if workers == 0:
+        for path in paths:
+            yield emit(extract(path, timeout, max_pages))
+        return
+
+    workers = workers or os.cpu_count() or 1
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        while True:
+            while len(pending) < workers * 4:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending.add(pool.submit(extract, path, timeout, max_pages))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield emit(future.result())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text from a folder of PDF/DOCX/TXT resumes in parallel.")
+    parser.add_argument('path', help="Folder to scan recursively")
+    parser.add_argument('--out', help="Optional folder for extracted .txt files")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (0 runs in-process)")
+    parser.add_argument('--timeout', type=float, default=30, help="Per-file limit in seconds")
+    parser.add_argument('--max-pages', type=int, default=None, help="Only read the first N pages of each PDF")
+    args = parser.parse_args(argv)
+
+    stats = IngestStats()
+    for record in ingest(find_documents(args.path), args.workers, args.timeout, args.max_pages, stats):
+        if record.error:
+            print(f"{record.path}: {record.error}", file=sys.stderr)
+        elif args.out:
+            target = os.path.join(args.out, os.path.relpath(record.path, args.path)) + '.txt'
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(record.text)
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
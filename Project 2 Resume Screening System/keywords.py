@@ -0,0 +1,85 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+class KeywordVocabulary:
+    # Token -> integer id over whitespace tokens of preprocessed text. Only JD keywords are added beyond
+    # the TF-IDF terms, so matching stays exact for words the vectorizer filtered out while resume text,
+    # however much of it streams through, never grows the vocabulary.
+    def __init__(self, tokens=()):
+        self.index = {}
+        self.tokens = []
+        for token in tokens:
+            self.add(token)
+
+    @classmethod
+    def from_vectorizer(cls, tfidf):
+        # Seeding with the vectorizer's terms keeps their ids aligned with TF-IDF columns
+        return cls(sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get))
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def add(self, token):
+        token_id = self.index.get(token)
+        if token_id is None:
+            token_id = self.index[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def binary_matrix(self, texts):
+        # One row per text with a 1 for every distinct known token. Unknown tokens can never match a
+        # keyword, since every keyword was added when its KeywordMatcher was built, so they are dropped.
+        lookup = self.index.get
+        indptr = [0]
+        indices = []
+        for text in texts:
+            indices.extend(i for i in map(lookup, set(text.split())) if i is not None)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.float64), indices, indptr),
+            shape=(len(indptr) - 1, len(self.tokens)),
+        )
+
+
+class KeywordMatcher:
+    # One JD's keyword set matched against many binary rows at once. Counts equal
+    # len(set(jd.split()) & set(resume.split())) exactly, so ratios match calculate_similarity.
+    def __init__(self, jd_processed, vocabulary):
+        self.vocabulary = vocabulary
+        self.keywords = list(dict.fromkeys(jd_processed.split()))
+        self.ids = np.array([vocabulary.add(token) for token in self.keywords], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _indicator(self, n_columns):
+        indicator = np.zeros(n_columns)
+        indicator[self.ids[self.ids < n_columns]] = 1
+        return indicator
+
+    def match_counts(self, matrix):
+        return matrix @ self._indicator(matrix.shape[1])
+
+    def match_ratios(self, matrix):
+        if not len(self):
+            return np.zeros(matrix.shape[0])
+        return self.match_counts(matrix) / len(self)
+
+    def matched_keywords(self, matrix, limit=10):
+        # Matched tokens per row in JD order, gathered for all rows with array ops
+        matrix = matrix.tocsr()
+        n_rows, n_columns = matrix.shape
+        rank = np.full(n_columns, len(self), dtype=np.int64)
+        valid = self.ids < n_columns
+        rank[self.ids[valid]] = np.flatnonzero(valid)
+
+        rows = np.repeat(np.arange(n_rows), np.diff(matrix.indptr))
+        hit = rank[matrix.indices] < len(self)
+        ids, rows = matrix.indices[hit], rows[hit]
+        order = np.lexsort((rank[ids], rows))
+        ids, rows = ids[order], rows[order]
+
+        groups = np.split(ids, np.cumsum(np.bincount(rows, minlength=n_rows))[:-1])
+        tokens = self.vocabulary.tokens
+        return [[tokens[i] for i in group[:limit]] for group in groups]
@@ -0,0 +1,78 @@
+import re
+
+SPACY_MODEL = 'en_core_web_sm'
+# Lemmas come from tagger + attribute_ruler + lemmatizer; the parser and NER do not affect them
+SLIM_EXCLUDE = ['parser', 'ner']
+
+URL_RE = re.compile(r'http\S+|www\S+|https\S+')
+EMAIL_RE = re.compile(r'\S+@\S+')
+DIGITS_RE = re.compile(r'[0-9]+')
+
+
+def clean_text(text):
+    text = text.lower()
+    text = URL_RE.sub('', text)
+    text = EMAIL_RE.sub('', text)
+    return DIGITS_RE.sub('', text)
+
+
+def lemmatize(doc):
+    return ' '.join(token.lemma_ for token in doc if not token.is_punct)
+
+
+def load_nlp(model=SPACY_MODEL, slim=True):
+    import spacy
+    return spacy.load(model, exclude=SLIM_EXCLUDE if slim else [])
+
+
+def cache_namespace(model=SPACY_MODEL):
+    # Read from package metadata so caches can be keyed before spaCy is imported
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return f"{model}-{version(model)}"
+    except PackageNotFoundError:
+        return model
+
+
+class Preprocessor:
+    # Drop-in for the app's preprocess_text: call it with one text, or use pipe() for many.
+    # Misses are run through nlp.pipe in batches; hits come from the optional TextCache.
+    def __init__(self, nlp=None, cache=None, batch_size=64, n_process=1):
+        self.nlp = nlp if nlp is not None else load_nlp()
+        self.cache = cache
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+    def _process(self, text):
+        return lemmatize(self.nlp(clean_text(text)))
+
+    def __call__(self, text):
+        if self.cache is None:
+            return self._process(text)
+        return self.cache.get_or_compute(text, self._process)
+
+    def pipe(self, texts, batch_size=None, n_process=None):
+        texts = list(texts)
+        results = [None] * len(texts)
+        keys = [None] * len(texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            if self.cache is not None:
+                keys[i] = self.cache.key(text)
+                results[i] = self.cache.get(keys[i])
+            if results[i] is None:
+                # Identical texts in one call are only parsed once
+                pending.setdefault(text, []).append(i)
+
+        docs = self.nlp.pipe(
+            (clean_text(text) for text in pending),
+            batch_size=batch_size or self.batch_size,
+            n_process=n_process or self.n_process,
+        )
+        for (text, positions), doc in zip(pending.items(), docs):
+            processed = lemmatize(doc)
+            for i in positions:
+                results[i] = processed
+            if self.cache is not None:
+                self.cache.put(keys[positions[0]], processed)
+        return results
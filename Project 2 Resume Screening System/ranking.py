@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import normalize
+
+from documents import read_path
+from ingest import find_documents, ingest
+from keywords import KeywordMatcher, KeywordVocabulary
+from telemetry import request, timer
+
+
+def final_score(similarity, keyword_match_ratio):
+    # calculate_similarity's formula for scalars or arrays; np.round matches round() on numpy floats
+    similarity_percent = np.round(np.asarray(similarity, dtype=np.float64) * 100, 2)
+    keyword_match_ratio = np.asarray(keyword_match_ratio, dtype=np.float64)
+    return np.round(0.7 * similarity_percent + 0.3 * (keyword_match_ratio * 100), 2)[()]
+
+
+def iter_csv(path, text_column='resume_text', id_column='resume_id', chunksize=1000):
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=[id_column, text_column]):
+        yield from zip(chunk[id_column].tolist(), chunk[text_column].fillna('').tolist())
+
+
+def iter_directory(path, workers=None, timeout=30, max_pages=None):
+    for record in ingest(find_documents(path), workers, timeout, max_pages):
+        if record.error:
+            print(f"Skipping {record.path}: {record.error}", file=sys.stderr)
+            continue
+        yield os.path.relpath(record.path, path), record.text
+
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class JobDescription:
+    # The JD side of every comparison, vectorised once and reused for all resumes
+    def __init__(self, text, tfidf, preprocessor, vocabulary=None):
+        self.processed = preprocessor(text)
+        self.vector = normalize(tfidf.transform([self.processed]))
+        self.vocabulary = vocabulary if vocabulary is not None else KeywordVocabulary.from_vectorizer(tfidf)
+        self.keywords = KeywordMatcher(self.processed, self.vocabulary)
+
+
+def score_batch(jd, resume_matrix, keyword_matrix):
+    # (1 x terms) . (terms x n): same summation order as the pairwise cosine_similarity call
+    similarity = (jd.vector @ normalize(resume_matrix).T).toarray().ravel()
+    return similarity, jd.keywords.match_ratios(keyword_matrix)
+
+
+def rank_resumes(jd_text, resumes, tfidf, preprocessor, top_k=10, batch_size=1000, model=None):
+    jd = JobDescription(jd_text, tfidf, preprocessor)
+    best = []
+
+    for batch in batched(resumes, batch_size):
+        with request('rank.batch'):
+            ids = [resume_id for resume_id, _ in batch]
+            with timer('rank.preprocess'):
+                processed = preprocessor.pipe(text for _, text in batch)
+            with timer('rank.transform'):
+                matrix = tfidf.transform(processed)
+                keyword_matrix = jd.vocabulary.binary_matrix(processed)
+            with timer('rank.score'):
+                similarity, ratio = score_batch(jd, matrix, keyword_matrix)
+                scores = final_score(similarity, ratio)
+
+            keep = np.argsort(-scores, kind='stable')[:top_k]
+            with timer('rank.predict'):
+                roles = model.predict(matrix[keep]) if model is not None and len(keep) else [None] * len(keep)
+            matched = jd.keywords.matched_keywords(keyword_matrix[keep])
+        for i, role, keywords in zip(keep, roles, matched):
+            best.append({
+                'resume_id': ids[i],
+                'final_score': float(scores[i]),
+                'similarity': float(similarity[i]),
+                'keyword_match_ratio': float(ratio[i]),
+                'predicted_role': role,
+                'matched_keywords': keywords,
+            })
+        best = sorted(best, key=lambda r: r['final_score'], reverse=True)[:top_k]
+
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank many resumes against one job description.")
+    parser.add_argument('jd', help="Job description file (.txt, .pdf or .docx)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--dir', help="Folder of resumes (.txt, .pdf, .docx), searched recursively")
+    source.add_argument('--csv', default='Dataset/resume.csv', help="CSV with resume_id and resume_text columns")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--n-process', type=int, default=1, help="spaCy worker processes")
+    parser.add_argument('--output', help="Optional CSV for the ranking")
+    args = parser.parse_args(argv)
+
+    import joblib
+    from preprocess import Preprocessor
+
+    tfidf = joblib.load('tfidf_vectorizer.pkl')
+    model = joblib.load('resume_classifier.pkl')
+    preprocessor = Preprocessor(n_process=args.n_process)
+    resumes = iter_directory(args.dir) if args.dir else iter_csv(args.csv)
+
+    ranking = rank_resumes(read_path(args.jd), resumes, tfidf, preprocessor,
+                           top_k=args.top_k, batch_size=args.batch_size, model=model)
+    df = pd.DataFrame(ranking)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    with pd.option_context('display.max_colwidth', 60, 'display.width', 200):
+        print(df.drop(columns=['matched_keywords']).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
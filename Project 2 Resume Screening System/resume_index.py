@@ -0,0 +1,271 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from ranking import batched, iter_csv, iter_directory
+from storage import atomic_write_json
+from telemetry import timed
+
+MANIFEST_FILE = 'index.json'
+INDEX_VERSION = 1
+
+
+def vocabulary_fingerprint(tfidf):
+    terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+    return hashlib.sha256('\0'.join(terms).encode('utf-8')).hexdigest()
+
+
+class Segment:
+    # One immutable batch of resumes stored column-wise (CSC): for every term, the rows that contain it
+    # and their L2-normalised TF-IDF weights. That is an inverted index, and each array is a .npy file
+    # opened as a memory map.
+    FILES = ('ids', 'indptr', 'docs', 'weights', 'norms')
+
+    def __init__(self, path, deleted=()):
+        self.path = path
+        self.name = os.path.basename(path)
+        for name in self.FILES:
+            setattr(self, name, np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r'))
+        self.deleted = set(deleted)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def write(cls, path, ids, matrix):
+        matrix = matrix.tocsr().astype(np.float64)
+        norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+        # Rows are scaled in place rather than with normalize(), which rejects a matrix with no rows
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        matrix.data *= np.repeat(inverse, np.diff(matrix.indptr))
+        return cls.save(path, ids, matrix.tocsc(), norms)
+
+    @classmethod
+    def save(cls, path, ids, csc, norms):
+        # Stores weights that are already L2-normalised as they are, so merging segments does not
+        # rescale them again
+        os.makedirs(path)
+        csc.sort_indices()
+        arrays = {
+            'ids': np.asarray([str(i) for i in ids], dtype=str),
+            'indptr': csc.indptr.astype(np.int64),
+            'docs': csc.indices.astype(np.int32),
+            'weights': csc.data.astype(np.float32, copy=False),
+            'norms': np.asarray(norms).astype(np.float32, copy=False),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), arr)
+        return cls(path)
+
+    def scores(self, terms, query_weights):
+        starts = self.indptr[terms]
+        lengths = self.indptr[terms + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.zeros(len(self))
+        # Concatenate the postings of every query term without a Python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        weights = self.weights[offsets] * np.repeat(query_weights, lengths)
+        return np.bincount(self.docs[offsets], weights=weights, minlength=len(self))
+
+
+class ResumeIndex:
+    def __init__(self, path, manifest, tfidf=None, preprocessor=None):
+        self.path = path
+        self.manifest = manifest
+        self.tfidf = tfidf
+        self.preprocessor = preprocessor
+        self.segments = [Segment(os.path.join(path, s['name']), s['deleted']) for s in manifest['segments']]
+        self._locations = None
+
+    @classmethod
+    def create(cls, path, tfidf, preprocessor=None):
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            raise FileExistsError(f"An index already exists in {path}")
+        os.makedirs(path, exist_ok=True)
+        manifest = {
+            'version': INDEX_VERSION,
+            'n_terms': len(tfidf.vocabulary_),
+            'vocabulary': vocabulary_fingerprint(tfidf),
+            'next_segment': 0,
+            'segments': [],
+        }
+        index = cls(path, manifest, tfidf, preprocessor)
+        index._save_manifest()
+        return index
+
+    @classmethod
+    def open(cls, path, tfidf=None, preprocessor=None):
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {manifest.get('version')}")
+        if tfidf is not None and vocabulary_fingerprint(tfidf) != manifest['vocabulary']:
+            raise ValueError("The index was built with a different TF-IDF vocabulary")
+        return cls(path, manifest, tfidf, preprocessor)
+
+    def __len__(self):
+        return sum(len(s) - len(s.deleted) for s in self.segments)
+
+    def _save_manifest(self):
+        self.manifest['segments'] = [{'name': s.name, 'deleted': sorted(s.deleted)} for s in self.segments]
+        atomic_write_json(os.path.join(self.path, MANIFEST_FILE), self.manifest)
+
+    @property
+    def locations(self):
+        if self._locations is None:
+            self._locations = {}
+            for seg_no, segment in enumerate(self.segments):
+                for row, resume_id in enumerate(segment.ids.tolist()):
+                    if row not in segment.deleted:
+                        self._locations[resume_id] = (seg_no, row)
+        return self._locations
+
+    @timed('index.add')
+    def add(self, ids, matrix):
+        ids = [str(i) for i in ids]
+        if matrix.shape[1] != self.manifest['n_terms']:
+            raise ValueError(f"Expected {self.manifest['n_terms']} TF-IDF columns, got {matrix.shape[1]}")
+        if not ids:
+            return
+        # An id repeated within the batch keeps its last row, as if the rows had been added one by one
+        last = sorted({resume_id: row for row, resume_id in enumerate(ids)}.values())
+        if len(last) < len(ids):
+            ids = [ids[row] for row in last]
+            matrix = matrix.tocsr()[last]
+        # Re-adding an id replaces the previous version
+        self._mark_deleted(ids)
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest['next_segment'] += 1
+        self.segments.append(Segment.write(os.path.join(self.path, name), ids, matrix))
+        self._save_manifest()
+        for row, resume_id in enumerate(ids):
+            self.locations[resume_id] = (len(self.segments) - 1, row)
+
+    def add_texts(self, ids, texts):
+        self.add(ids, self.tfidf.transform(self.preprocessor.pipe(texts)))
+
+    def _mark_deleted(self, ids):
+        removed = 0
+        for resume_id in ids:
+            location = self.locations.pop(resume_id, None)
+            if location is not None:
+                seg_no, row = location
+                self.segments[seg_no].deleted.add(row)
+                removed += 1
+        return removed
+
+    def remove(self, ids):
+        removed = self._mark_deleted([str(i) for i in ids])
+        self._save_manifest()
+        return removed
+
+    @timed('index.search')
+    def search(self, query, top_k=10):
+        query = normalize(query.tocsr())
+        terms, query_weights = query.indices.astype(np.int64), query.data
+        ids, scores = [], []
+        for segment in self.segments:
+            seg_scores = segment.scores(terms, query_weights)
+            if segment.deleted:
+                seg_scores[list(segment.deleted)] = 0
+            candidates = np.flatnonzero(seg_scores > 0)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-seg_scores[candidates], top_k)[:top_k]]
+            ids.extend(segment.ids[candidates].tolist())
+            scores.extend(seg_scores[candidates].tolist())
+        order = np.argsort(-np.asarray(scores), kind='stable')[:top_k]
+        return [(ids[i], scores[i]) for i in order]
+
+    def search_text(self, jd_text, top_k=10):
+        return self.search(self.tfidf.transform([self.preprocessor(jd_text)]), top_k)
+
+    @timed('index.compact')
+    def compact(self):
+        # Merge all segments into one and drop deleted rows
+        import scipy.sparse as sp
+
+        if len(self.segments) <= 1 and not any(s.deleted for s in self.segments):
+            return
+        ids, blocks, norms = [], [], []
+        for segment in self.segments:
+            keep = np.setdiff1d(np.arange(len(segment)), list(segment.deleted))
+            # The stored rows are already normalised, so they are merged as float32 without
+            # scaling them back by their norms
+            blocks.append(sp.csc_matrix(
+                (np.asarray(segment.weights), np.asarray(segment.docs), np.asarray(segment.indptr)),
+                shape=(len(segment), self.manifest['n_terms']),
+            ).tocsr()[keep])
+            norms.append(np.asarray(segment.norms)[keep])
+            ids.extend(segment.ids[keep].tolist())
+
+        old = self.segments
+        if ids:
+            name = f"seg-{self.manifest['next_segment']:06d}"
+            self.manifest['next_segment'] += 1
+            merged = sp.vstack(blocks, format='csr').tocsc()
+            self.segments = [Segment.save(os.path.join(self.path, name), ids, merged, np.concatenate(norms))]
+        else:
+            # Every row was removed
+            self.segments = []
+        self._save_manifest()
+        self._locations = None
+        for segment in old:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Persistent TF-IDF index of the resume pool.")
+    parser.add_argument('command', choices=['build', 'add', 'remove', 'query', 'compact'])
+    parser.add_argument('args', nargs='*', help="JD file for query, resume ids for remove")
+    parser.add_argument('--index', default='resume_index')
+    parser.add_argument('--csv', help="CSV with resume_id and resume_text columns")
+    parser.add_argument('--dir', help="Folder of resumes (.txt, .pdf, .docx)")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--n-process', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    import joblib
+    from preprocess import Preprocessor
+
+    tfidf = joblib.load('tfidf_vectorizer.pkl')
+    preprocessor = Preprocessor(n_process=args.n_process)
+    if args.command == 'build':
+        index = ResumeIndex.create(args.index, tfidf, preprocessor)
+    else:
+        index = ResumeIndex.open(args.index, tfidf, preprocessor)
+
+    start = time.perf_counter()
+    if args.command in ('build', 'add'):
+        resumes = iter_directory(args.dir) if args.dir else iter_csv(args.csv or 'Dataset/resume.csv')
+        for batch in batched(resumes, args.batch_size):
+            index.add_texts([i for i, _ in batch], [t for _, t in batch])
+        if args.command == 'build':
+            index.compact()
+        print(f"{len(index):,} resumes indexed in {time.perf_counter() - start:.2f}s")
+    elif args.command == 'remove':
+        print(f"Removed {index.remove(args.args)} resume(s); {len(index):,} remain")
+    elif args.command == 'compact':
+        index.compact()
+        print(f"Compacted to {len(index.segments)} segment(s) in {time.perf_counter() - start:.2f}s")
+    else:
+        from documents import read_path
+
+        query = tfidf.transform([preprocessor(read_path(args.args[0]))])
+        start = time.perf_counter()
+        results = index.search(query, args.top_k)
+        elapsed = time.perf_counter() - start
+        for rank, (resume_id, score) in enumerate(results, start=1):
+            print(f"{rank:>3}. {resume_id:<30} {score * 100:6.2f}%")
+        print(f"Query over {len(index):,} resumes took {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
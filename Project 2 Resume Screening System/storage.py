@@ -0,0 +1,11 @@
+import os
+import sys
+
+# atomic_io.py lives at the repository root so both projects share one implementation
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from atomic_io import (  # noqa: E402
+    TableWriter, atomic_write_json, atomic_write_text, current_version, new_version, replace_dir, staging_dir,
+)
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# instrumentation.py lives at the repository root so both projects share one implementation
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from instrumentation import (  # noqa: E402
+    REGISTRY, incr, observe, profiled, request, run_probe, snapshot, stage, stage_timings, summary_rows, timed, timer,
+    to_json, to_prometheus,
+)
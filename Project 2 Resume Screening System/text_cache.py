@@ -0,0 +1,81 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class TextCache:
+    # LRU cache of preprocessed text keyed by a hash of the raw input. An optional SQLite file backs
+    # the in-memory entries so results survive restarts and are shared between app replicas on one host.
+    def __init__(self, maxsize=2048, path=None, namespace=''):
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS preprocessed (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def key(self, text):
+        # The namespace (e.g. spaCy model name and version) keeps stale lemmas out of a persistent store
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM preprocessed WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO preprocessed (key, value) VALUES (?, ?)", (key, value))
+                self._db.commit()
+
+    def _remember(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_compute(self, text, fn):
+        key = self.key(text)
+        value = self.get(key)
+        if value is None:
+            value = fn(text)
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM preprocessed")
+                self._db.commit()
@@ -0,0 +1,260 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from storage import staging_dir
+from telemetry import stage, stage_timings
+
+DEFAULT_CSV = 'Dataset/resume.csv'
+DEFAULT_CACHE_DIR = 'tfidf_cache'
+CACHE_VERSION = 2
+TEXTS_FILE = 'texts.json'
+TFIDF_PARAMS = {'max_features': 5000, 'ngram_range': [1, 2], 'sublinear_tf': True, 'min_df': 2}
+
+# Candidate name -> (estimator class path, constructor params). Kept as data so workers can build them.
+CANDIDATES = {
+    'naive_bayes': ('sklearn.naive_bayes.MultinomialNB', {'alpha': 0.1}),
+    'linear_svm': ('sklearn.svm.LinearSVC', {'C': 1.0}),
+    'logistic_regression': ('sklearn.linear_model.LogisticRegression', {'C': 10.0, 'max_iter': 1000}),
+}
+LATENCY_SAMPLES = 200
+
+
+def build_estimator(name, seed=None):
+    import importlib
+
+    path, params = CANDIDATES[name]
+    module, cls = path.rsplit('.', 1)
+    estimator = getattr(importlib.import_module(module), cls)(**params)
+    if seed is not None and 'random_state' in estimator.get_params():
+        estimator.set_params(random_state=seed)
+    return estimator
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(csv_path, namespace, tfidf_params):
+    # Any change to the data, the spaCy model or the vectorizer settings invalidates the cache
+    payload = json.dumps({'version': CACHE_VERSION, 'data': file_digest(csv_path), 'namespace': namespace,
+                          'tfidf': tfidf_params}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def make_vectorizer(tfidf_params):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(**dict(tfidf_params, ngram_range=tuple(tfidf_params['ngram_range'])))
+
+
+def load_features(cache_dir, key=None):
+    # Returns (X, y, classes) from a feature cache, or None if it is missing or was built from other inputs
+    import scipy.sparse as sp
+
+    try:
+        with open(os.path.join(cache_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if key is not None and manifest.get('key') != key:
+        return None
+    X = sp.load_npz(os.path.join(cache_dir, 'X.npz'))
+    y = np.load(os.path.join(cache_dir, 'y.npy'))
+    return X, y, manifest['classes']
+
+
+def build_features(csv_path, cache_dir, key, tfidf_params, preprocessor):
+    import joblib
+    import scipy.sparse as sp
+
+    df = pd.read_csv(csv_path, usecols=['resume_text', 'category'])
+    with stage('preprocess'):
+        processed = preprocessor.pipe(df['resume_text'].fillna('').tolist())
+    with stage('vectorize'):
+        tfidf = make_vectorizer(tfidf_params)
+        X = tfidf.fit_transform(processed).tocsr()
+        labels = pd.Categorical(df['category'])
+        y = labels.codes.astype(np.int16)
+        print(f"  {X.shape[0]:,} resumes x {X.shape[1]:,} terms, {X.nnz:,} nonzeros")
+
+    with staging_dir(cache_dir) as tmp:
+        sp.save_npz(os.path.join(tmp, 'X.npz'), X)
+        np.save(os.path.join(tmp, 'y.npy'), y)
+        with open(os.path.join(tmp, TEXTS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(processed, f)
+        joblib.dump(tfidf, os.path.join(tmp, 'tfidf_vectorizer.pkl'))
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump({'key': key, 'classes': [str(c) for c in labels.categories], 'shape': list(X.shape)}, f, indent=2)
+    return X, y, [str(c) for c in labels.categories]
+
+
+# Worker state: each process loads the preprocessed texts once and keeps the TF-IDF matrices of the
+# fold it last vectorized. Tasks are queued fold by fold, so that is refitted about once per fold, not
+# per candidate.
+_worker = {}
+
+
+def _init_worker(cache_dir, tfidf_params):
+    with open(os.path.join(cache_dir, TEXTS_FILE), encoding='utf-8') as f:
+        texts = np.asarray(json.load(f), dtype=object)
+    _worker.update(texts=texts, y=np.load(os.path.join(cache_dir, 'y.npy')), tfidf_params=tfidf_params, fold=None)
+
+
+def _use_fold(fold, train_idx, test_idx):
+    # The vectorizer is fitted on the training rows only, so the held-out fold adds nothing to the
+    # vocabulary or the IDF weights it is scored with
+    if _worker['fold'] == fold:
+        return
+    texts = _worker['texts']
+    _worker.update(fold=None, X_train=None, X_test=None)
+    tfidf = make_vectorizer(_worker['tfidf_params'])
+    X_train = tfidf.fit_transform(texts[train_idx]).tocsr()
+    _worker.update(fold=fold, X_train=X_train, X_test=tfidf.transform(texts[test_idx]).tocsr())
+
+
+def _fit_fold(name, fold, train_idx, test_idx, seed):
+    from sklearn.metrics import accuracy_score, f1_score
+
+    _use_fold(fold, train_idx, test_idx)
+    y = _worker['y']
+    estimator = build_estimator(name, seed)
+    start = time.perf_counter()
+    estimator.fit(_worker['X_train'], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    X_test = _worker['X_test']
+    start = time.perf_counter()
+    y_pred = estimator.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    # Single-resume latency, as the app sees it: one sparse row per predict call
+    single = []
+    for i in range(min(LATENCY_SAMPLES, X_test.shape[0])):
+        row = X_test[i]
+        start = time.perf_counter()
+        estimator.predict(row)
+        single.append(time.perf_counter() - start)
+
+    return {
+        'model': name,
+        'fold': fold,
+        'accuracy': accuracy_score(y[test_idx], y_pred),
+        'f1_macro': f1_score(y[test_idx], y_pred, average='macro'),
+        'fit_seconds': fit_seconds,
+        'batch_us_per_resume': batch_seconds / len(test_idx) * 1e6,
+        'single_p50_ms': float(np.percentile(single, 50)) * 1000,
+        'single_p99_ms': float(np.percentile(single, 99)) * 1000,
+        'model_bytes': len(pickle.dumps(estimator, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def summarize(results):
+    df = pd.DataFrame(results)
+    metrics = ['accuracy', 'f1_macro', 'fit_seconds', 'batch_us_per_resume', 'single_p50_ms', 'single_p99_ms', 'model_bytes']
+    summary = df.groupby('model')[metrics].mean()
+    summary['accuracy_std'] = df.groupby('model')['accuracy'].std()
+    summary['f1_std'] = df.groupby('model')['f1_macro'].std()
+    return summary.sort_values('f1_macro', ascending=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and compare resume classifiers on cost as well as accuracy.")
+    parser.add_argument('--data', default=DEFAULT_CSV)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Where the preprocessed texts and TF-IDF matrix are cached")
+    parser.add_argument('--rebuild', action='store_true', help="Ignore an existing feature cache")
+    parser.add_argument('--models', nargs='*', default=list(CANDIDATES), choices=list(CANDIDATES))
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--n-process', type=int, default=1, help="spaCy worker processes for preprocessing")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--preprocess-cache', help="Optional SQLite file for the preprocessing cache")
+    parser.add_argument('--report', help="Optional JSON file for the per-fold results and summary")
+    parser.add_argument('--export', choices=list(CANDIDATES),
+                        help="Refit this model on all data and write resume_classifier.pkl / tfidf_vectorizer.pkl")
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    if args.export and not hasattr(build_estimator(args.export), 'predict_proba'):
+        parser.error(f"{args.export} has no predict_proba, which the app needs for its role chart")
+
+    from preprocess import cache_namespace
+
+    with stage('features'):
+        namespace = cache_namespace()
+        key = cache_key(args.data, namespace, TFIDF_PARAMS)
+        cached = None if args.rebuild else load_features(args.cache_dir, key)
+        if cached is not None:
+            print(f"  using cached features in {args.cache_dir}/")
+            X, y, classes = cached
+        else:
+            from preprocess import Preprocessor
+            from text_cache import TextCache
+
+            cache = TextCache(path=args.preprocess_cache, namespace=namespace) if args.preprocess_cache else None
+            preprocessor = Preprocessor(cache=cache, batch_size=args.batch_size, n_process=args.n_process)
+            X, y, classes = build_features(args.data, args.cache_dir, key, TFIDF_PARAMS, preprocessor)
+        print(f"  {len(classes)} classes: {', '.join(classes)}")
+
+    with stage('cross_validate'):
+        from sklearn.model_selection import StratifiedKFold
+
+        splits = list(StratifiedKFold(args.folds, shuffle=True, random_state=args.seed).split(np.zeros(len(y)), y))
+        tasks = [(name, fold, train_idx, test_idx)
+                 for (fold, (train_idx, test_idx)), name in itertools.product(enumerate(splits), args.models)]
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.cache_dir, TFIDF_PARAMS)) as pool:
+            results = list(pool.map(_fit_fold, *zip(*tasks), itertools.repeat(args.seed)))
+
+    summary = summarize(results)
+    print(f"\n{args.folds}-fold cross-validation on {len(y):,} resumes:")
+    print(f"{'model':<22}{'accuracy':>16}{'f1 macro':>16}{'fit s':>8}{'us/resume':>11}"
+          f"{'p50 ms':>8}{'p99 ms':>8}{'size KB':>9}")
+    for name, r in summary.iterrows():
+        print(f"{name:<22}{r['accuracy']:>9.4f} ±{r['accuracy_std']:.3f}{r['f1_macro']:>9.4f} ±{r['f1_std']:.3f}"
+              f"{r['fit_seconds']:>8.2f}{r['batch_us_per_resume']:>11.1f}{r['single_p50_ms']:>8.3f}"
+              f"{r['single_p99_ms']:>8.3f}{r['model_bytes'] / 1024:>9.1f}")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'folds': results, 'summary': summary.reset_index().to_dict(orient='records'),
+                       'timings': stage_timings()}, f, indent=2)
+
+    if args.export:
+        import joblib
+
+        with stage('export'):
+            # Labels are refit as strings so the exported model predicts category names, as the app expects
+            estimator = build_estimator(args.export, args.seed)
+            estimator.fit(X, np.asarray(classes, dtype=object)[y])
+            os.makedirs(args.out_dir, exist_ok=True)
+            joblib.dump(estimator, os.path.join(args.out_dir, 'resume_classifier.pkl'))
+            shutil.copyfile(os.path.join(args.cache_dir, 'tfidf_vectorizer.pkl'),
+                            os.path.join(args.out_dir, 'tfidf_vectorizer.pkl'))
+            print(f"  wrote {args.export} to {args.out_dir}/")
+
+            from compact_model import DEFAULT_MODEL_DIR, write_compact
+            tfidf = joblib.load(os.path.join(args.out_dir, 'tfidf_vectorizer.pkl'))
+            compact_dir = write_compact(tfidf, estimator, os.path.join(args.out_dir, DEFAULT_MODEL_DIR))
+            print(f"  wrote compact export to {compact_dir}/")
+
+    print("\nStage timings:")
+    for name, seconds in stage_timings().items():
+        print(f"  {name:<15}{seconds:>10.2f}s")
+
+
+if __name__ == "__main__":
+    main()
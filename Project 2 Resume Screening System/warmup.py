@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundLoader:
+    # Submits every loader to a background pool as soon as it is created. get() blocks only while
+    # that resource is still loading and re-raises its error, if any, at the point of use.
+    def __init__(self, loaders, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warmup')
+        self._futures = {name: self._executor.submit(fn) for name, fn in loaders.items()}
+
+    def get(self, name):
+        return self._futures[name].result()
+
+    def status(self):
+        return {
+            name: 'loading' if not f.done() else 'failed' if f.exception() else 'ready'
+            for name, f in self._futures.items()
+        }
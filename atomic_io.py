@@ -0,0 +1,150 @@
+# Crash-safe writes for caches, manifests and exported models, shared by both projects (each reaches
+# it through its own storage.py). Files are written beside their target and renamed over it. Trees
+# are built in a uniquely named sibling directory and swapped in, so concurrent builds never share a
+# staging directory and an interrupted build never leaves a tree that looks valid. Exports read as
+# several files by separate loaders are published as immutable versions behind a CURRENT pointer.
+# Tables written in chunks go to a temporary file that is renamed over the target on close.
+import json
+import os
+import re
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+CURRENT_FILE = 'CURRENT'
+VERSION_RE = re.compile(r'^\d{8}-\d{6}-\d{6}-[0-9a-f]{8}$')
+
+
+def sibling(path, tag):
+    # A name next to `path` that no other process or call will pick
+    return f"{path.rstrip('/' + os.sep)}.{tag}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def atomic_write_text(path, text):
+    tmp = sibling(path, 'tmp')
+    try:
+        with open(tmp, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def atomic_write_json(path, obj, **kwargs):
+    atomic_write_text(path, json.dumps(obj, **kwargs))
+
+
+def replace_dir(src, dst):
+    # rename(2) cannot replace a non-empty directory, so the current tree is renamed aside first and
+    # deleted only once the new one is in place; a crash in between leaves it intact as dst.old-*.
+    # If another writer swaps its tree in between, the loop moves that one aside too: last writer wins.
+    while True:
+        old = None
+        if os.path.exists(dst):
+            old = sibling(dst, 'old')
+            os.replace(dst, old)
+        try:
+            os.replace(src, dst)
+        except OSError:
+            if old is None:
+                raise
+            if not os.path.exists(dst):
+                os.replace(old, dst)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+            continue
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+        return dst
+
+
+@contextmanager
+def staging_dir(target):
+    # Yields an empty directory next to `target` that replaces it when the block succeeds and is
+    # removed when it fails
+    tmp = sibling(target, 'tmp')
+    os.makedirs(tmp)
+    try:
+        yield tmp
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    replace_dir(tmp, target)
+
+
+def current_version(root):
+    # The version directory CURRENT points at, or `root` itself for an unversioned tree. Resolve once
+    # and load every part from the result, so a re-export in between cannot mix two versions.
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return os.path.join(root, f.read().strip())
+    except FileNotFoundError:
+        return root
+
+
+@contextmanager
+def new_version(root, keep=2):
+    # Yields a staging directory that becomes a new version under `root` when the block succeeds.
+    # CURRENT is then switched to it and all but the newest `keep` versions are deleted; the previous
+    # one is kept for readers that resolved the pointer just before the switch.
+    os.makedirs(root, exist_ok=True)
+    # Names sort by creation time down to the microsecond
+    version = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:8]}"
+    with staging_dir(os.path.join(root, version)) as tmp:
+        yield tmp
+    atomic_write_text(os.path.join(root, CURRENT_FILE), version)
+    versions = sorted(name for name in os.listdir(root) if VERSION_RE.match(name) and name != version)
+    for name in versions[:max(len(versions) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+class TableWriter:
+    # Appends DataFrames to one CSV, or to one Parquet file as a row group per frame. `empty` is a
+    # zero-row frame with the output columns and dtypes. It is written on close if nothing else was,
+    # so empty input still produces a file with a header or schema.
+    def __init__(self, path, empty=None):
+        self.path = path
+        self.empty = empty
+        self.parquet = path.endswith(('.parquet', '.pq'))
+        self._tmp = sibling(path, 'tmp')
+        self._writer = None
+        self._file = None
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self._tmp, table.schema)
+            self._writer.write_table(table)
+        else:
+            header = self._file is None
+            if self._file is None:
+                self._file = open(self._tmp, 'w', newline='', encoding='utf-8')
+            df.to_csv(self._file, header=header, index=False)
+
+    def close(self, commit=True):
+        if commit and self._writer is None and self._file is None and self.empty is not None:
+            self.write(self.empty)
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        if commit and os.path.exists(self._tmp):
+            os.replace(self._tmp, self.path)
+        elif os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(commit=exc_type is None)
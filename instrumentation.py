@@ -0,0 +1,304 @@
+# Stage timers, rolling latency histograms, opt-in profiling and metrics export, shared by both
+# projects (each reaches it through its own telemetry.py). Standard library only, so instrumenting
+# a module costs no startup time.
+#
+# Environment:
+#   INSTRUMENT_PROFILE       fraction of requests to profile with cProfile (e.g. 1 or 0.05)
+#   INSTRUMENT_PROFILE_DIR   where .prof files go (default "profiles")
+#   INSTRUMENT_METRICS_FILE  write metrics here when the process exits (.prom for Prometheus, else JSON)
+import atexit
+import cProfile
+import functools
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+ENV_PROFILE = 'INSTRUMENT_PROFILE'
+ENV_PROFILE_DIR = 'INSTRUMENT_PROFILE_DIR'
+ENV_METRICS_FILE = 'INSTRUMENT_METRICS_FILE'
+
+# Upper bounds in seconds for the cumulative Prometheus buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_WINDOW = 2048
+QUANTILES = (50, 90, 99)
+
+
+def _percentile(ordered, q):
+    # Linear interpolation between closest ranks, matching numpy's default
+    if not ordered:
+        return 0.0
+    pos = (len(ordered) - 1) * q / 100
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class Histogram:
+    # Lifetime count, sum and bucket counts for Prometheus, plus a rolling window of recent samples
+    # for percentiles that reflect current behaviour rather than the whole uptime
+    def __init__(self, window=DEFAULT_WINDOW, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+            self.samples.append(seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            ordered = sorted(self.samples)
+            count, total, peak = self.count, self.sum, self.max
+        out = {'count': count, 'total_ms': total * 1000, 'mean_ms': total / count * 1000 if count else 0.0,
+               'max_ms': peak * 1000}
+        for q in QUANTILES:
+            out[f'p{q}_ms'] = _percentile(ordered, q) * 1000
+        return out
+
+    def cumulative_buckets(self):
+        with self._lock:
+            return list(zip(self.buckets, itertools.accumulate(self.bucket_counts))), self.count, self.sum
+
+
+class Registry:
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, Histogram(self.window))
+        return hist
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name):
+        # Failed stages are timed too, and counted under "<name>.errors"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.incr(f'{name}.errors')
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        def decorate(fn):
+            stage = name or f'{fn.__module__}.{fn.__qualname__}'
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        return {
+            'uptime_s': time.time() - self.started,
+            'counters': dict(self.counters),
+            'stages': {name: hist.snapshot() for name, hist in sorted(self.histograms.items())},
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, namespace='app'):
+        # Text exposition format 0.0.4: one histogram family labelled by stage, plus rolling quantiles
+        # as a gauge family so dashboards can show recent p99 without a histogram_quantile query
+        lines = [f'# HELP {namespace}_stage_seconds Stage latency in seconds.',
+                 f'# TYPE {namespace}_stage_seconds histogram']
+        for name, hist in sorted(self.histograms.items()):
+            buckets, count, total = hist.cumulative_buckets()
+            label = _label(name)
+            for bound, cumulative in buckets:
+                lines.append(f'{namespace}_stage_seconds_bucket{{stage="{label}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{namespace}_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {count}')
+            lines.append(f'{namespace}_stage_seconds_sum{{stage="{label}"}} {total!r}')
+            lines.append(f'{namespace}_stage_seconds_count{{stage="{label}"}} {count}')
+        lines += [f'# HELP {namespace}_stage_recent_seconds Quantiles over the last {self.window} samples.',
+                  f'# TYPE {namespace}_stage_recent_seconds gauge']
+        for name, hist in sorted(self.histograms.items()):
+            snap = hist.snapshot()
+            for q in QUANTILES:
+                lines.append(f'{namespace}_stage_recent_seconds{{stage="{_label(name)}",quantile="{q / 100:g}"}} '
+                             f'{snap[f"p{q}_ms"] / 1000!r}')
+        for name, value in sorted(self.counters.items()):
+            metric = f'{namespace}_{_metric_name(name)}_total'
+            lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json(indent=2)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric_name(value):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', value)
+
+
+REGISTRY = Registry()
+observe = REGISTRY.observe
+incr = REGISTRY.incr
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+snapshot = REGISTRY.snapshot
+to_json = REGISTRY.to_json
+to_prometheus = REGISTRY.to_prometheus
+
+
+@contextmanager
+def stage(name, prefix='train'):
+    # A timer() for one step of a batch job that also prints when it starts and how long it took
+    print(f"[{name}] ...", flush=True)
+    with timer(f'{prefix}.{name}'):
+        yield
+    print(f"[{name}] {stage_timings(prefix)[name]:.2f}s", flush=True)
+
+
+def stage_timings(prefix='train', registry=REGISTRY):
+    # Seconds spent in each stage() under `prefix`, read back from the registry
+    head = f'{prefix}.'
+    return {name[len(head):]: stats['total_ms'] / 1000
+            for name, stats in registry.snapshot()['stages'].items() if name.startswith(head)}
+
+
+def profile_rate():
+    try:
+        return float(os.environ.get(ENV_PROFILE) or 0)
+    except ValueError:
+        return 0.0
+
+
+_profile_ids = itertools.count()
+
+
+@contextmanager
+def profiled(name):
+    # Yields the active cProfile.Profile for a sampled request, else None. Only one profiler can run
+    # per interpreter, so a request that overlaps another profiled one simply is not profiled.
+    rate = profile_rate()
+    if rate <= 0 or random.random() >= rate:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        directory = os.environ.get(ENV_PROFILE_DIR) or 'profiles'
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        profiler.dump_stats(os.path.join(directory, f'{_metric_name(name)}-{stamp}-{os.getpid()}-{next(_profile_ids)}.prof'))
+        REGISTRY.incr('profiles_captured')
+
+
+@contextmanager
+def request(name):
+    # Times one unit of work (a page analysis, a served batch) and profiles it when sampled
+    with profiled(name) as profiler, timer(name):
+        yield profiler
+
+
+def summary_rows(registry=REGISTRY):
+    # One flat row per stage, ready for a table widget or a log line
+    return [dict(stage=name, **snap) for name, snap in registry.snapshot()['stages'].items()]
+
+
+# Wrapped around the body given to run_probe. The body runs at module level in a fresh interpreter; it
+# may call mark(name) to record seconds since it started, add its own JSON-serialisable entries to
+# `result`, and read memory with peak_rss_mb() or current_rss_mb().
+_PROBE_HEAD = '''\
+import json as _json, os as _os, resource as _resource, sys as _sys, time as _time
+_start = _time.perf_counter()
+result = {}
+
+def mark(name):
+    result[name] = _time.perf_counter() - _start
+
+def peak_rss_mb():
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return _resource.getrusage(_resource.RUSAGE_SELF).ru_maxrss / (2**20 if _sys.platform == 'darwin' else 1024)
+
+def current_rss_mb():
+    # Resident set from /proc where available, otherwise the peak
+    try:
+        with open('/proc/self/statm') as _f:
+            return int(_f.read().split()[1]) * _os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+'''
+_PROBE_TAIL = '''
+result['max_rss_mb'] = peak_rss_mb()
+result['modules_loaded'] = {_m: _m in _sys.modules for _m in %r}
+print(_json.dumps(result))
+'''
+
+
+def run_probe(body, modules=(), cwd=None):
+    # Runs `body` in a fresh interpreter, so imports, load time and peak RSS are measured from a cold
+    # start, and returns its `result` with max_rss_mb and which of `modules` ended up imported
+    import subprocess
+    import sys
+
+    code = _PROBE_HEAD + body + _PROBE_TAIL % (list(modules),)
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True, cwd=cwd).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _dump_at_exit():
+    path = os.environ.get(ENV_METRICS_FILE)
+    if path:
+        REGISTRY.dump(path)
+
+
+# Pool workers would otherwise overwrite the parent's file with their own partial metrics
+if multiprocessing.parent_process() is None:
+    atexit.register(_dump_at_exit)